@@ -0,0 +1,511 @@
+"""
+Fake Discord gateway and REST API for offline load tests
+Runs on its own event loop thread so the bot under test does not share a loop with its load generator
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+import yarl
+from aiohttp import web
+
+import discord
+import discord.gateway
+import discord.http
+
+BOT_USER_ID = 900000000000000001
+APPLICATION_ID = 900000000000000002
+OWNER_USER_ID = 900000000000000003
+GUILD_ID = 910000000000000000
+BOT_ROLE_ID = 910000000000000001
+TEXT_CHANNEL_ID = 910000000000000010
+LOBBY_CHANNEL_ID = 910000000000000011
+CATEGORY_ID = 910000000000000012
+FIRST_USER_ID = 920000000000000000
+
+SNOWFLAKE = re.compile(r'\d{17,20}')
+ROUTE_ID = re.compile(r'\(?\\d\+\)?|\(\\w\+\)|\d{17,20}')
+TIMESTAMP = '2024-01-01T00:00:00+00:00'
+ADMINISTRATOR = str(discord.Permissions.all().value)
+EVERYONE = str(discord.Permissions.general().value | discord.Permissions.text().value | discord.Permissions.voice().value)
+
+
+def user_payload(user_id: int, bot: bool = False) -> Dict[str, Any]:
+    """Minimal user object; the id is embedded in the name for reply correlation"""
+    return {
+        'id': str(user_id),
+        'username': f'user{user_id}',
+        'global_name': None,
+        'discriminator': '0',
+        'avatar': None,
+        'bot': bot,
+    }
+
+
+def member_payload(user_id: int, roles: Optional[List[int]] = None, bot: bool = False) -> Dict[str, Any]:
+    """Minimal guild member object"""
+    return {
+        'user': user_payload(user_id, bot=bot),
+        'roles': [str(role) for role in roles or []],
+        'joined_at': TIMESTAMP,
+        'deaf': False,
+        'mute': False,
+        'flags': 0,
+    }
+
+
+def channel_payload(channel_id: int, name: str, channel_type: int, parent_id: Optional[int] = None,
+                    position: int = 0, overwrites: Optional[list] = None, **extra) -> Dict[str, Any]:
+    """Minimal guild channel object"""
+    data = {
+        'id': str(channel_id),
+        'guild_id': str(GUILD_ID),
+        'type': channel_type,
+        'name': name,
+        'position': position,
+        'parent_id': str(parent_id) if parent_id else None,
+        'permission_overwrites': overwrites or [],
+        'nsfw': False,
+        'flags': 0,
+    }
+    if channel_type == discord.ChannelType.voice.value:
+        data.update({'bitrate': 64000, 'user_limit': 0, 'rtc_region': None})
+    data.update(extra)
+    return data
+
+
+class FakeDiscord:
+    """A single-guild Discord stand-in speaking the v10 gateway and REST protocols
+
+    Every REST request is recorded. Registered ``watchers`` are checked against
+    each request so a load generator can measure event-to-reply latency.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, rest_latency: float = 0.0, seed: int = 1234):
+        self.host = host
+        self.port = port
+        self.rest_latency = rest_latency
+        self.random = random.Random(seed)
+        self.ids = itertools.count(930000000000000000)
+        self.sequence = itertools.count(1)
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.runner: Optional[web.AppRunner] = None
+        self.ready = threading.Event()
+        self.identified = threading.Event()
+        self.sockets: List[web.WebSocketResponse] = []
+
+        self.rest_calls: Counter = Counter()
+        # Extra latency per route, keyed like rest_calls (e.g. 'POST /guilds/{id}/channels')
+        self.route_latency: Dict[str, float] = {}
+        self.unknown_routes: Counter = Counter()
+        # Pending correlations: snowflake token -> (kind, method, path regex, sent time)
+        self.watchers: Dict[str, tuple] = {}
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.sent: Counter = Counter()
+
+        # Mutable guild state the REST stub keeps consistent with the gateway
+        self.channels: Dict[int, Dict[str, Any]] = {}
+        self.invites: Dict[str, Dict[str, Any]] = {}
+        self.roles: Dict[int, Dict[str, Any]] = {}
+        self.member_roles: Dict[int, set] = defaultdict(set)
+        self.vanity_url_code: Optional[str] = None
+        self.route_handlers: List[tuple] = []
+        self._register_routes()
+
+    # ------------------------------------------------------------------ lifecycle
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def start(self):
+        """Start the server thread and point discord.py at it"""
+        self.thread = threading.Thread(target=self._run, name='fake-discord', daemon=True)
+        self.thread.start()
+        self.ready.wait(10)
+        discord.http.Route.BASE = f'{self.base_url}/api/v10'
+        discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f'ws://{self.host}:{self.port}/gateway')
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._serve())
+        self.ready.set()
+        self.loop.run_forever()
+
+    async def _serve(self):
+        app = web.Application()
+        app.router.add_get('/gateway', self.handle_gateway)
+        app.router.add_route('*', '/api/v10/{path:.*}', self.handle_rest)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        """Shut the server down"""
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(10)
+
+    def call(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the fake server loop from another thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    # ------------------------------------------------------------------ gateway
+
+    def guild_payload(self) -> Dict[str, Any]:
+        """Full GUILD_CREATE payload with every member included so no chunking is needed"""
+        self.channels.setdefault(CATEGORY_ID, channel_payload(CATEGORY_ID, 'Temporary Channels', 4))
+        self.channels.setdefault(TEXT_CHANNEL_ID, channel_payload(TEXT_CHANNEL_ID, 'general', 0, position=1))
+        self.channels.setdefault(
+            LOBBY_CHANNEL_ID,
+            channel_payload(LOBBY_CHANNEL_ID, 'Create Channel', 2, parent_id=CATEGORY_ID, position=2)
+        )
+        return {
+            'id': str(GUILD_ID),
+            'name': 'Load Test Guild',
+            'icon': None,
+            'owner_id': str(OWNER_USER_ID),
+            'system_channel_id': str(TEXT_CHANNEL_ID),
+            'vanity_url_code': self.vanity_url_code,
+            'unavailable': False,
+            'member_count': 2,
+            'large': False,
+            'roles': [
+                {'id': str(GUILD_ID), 'name': '@everyone', 'permissions': EVERYONE, 'position': 0},
+                {'id': str(BOT_ROLE_ID), 'name': 'Bot', 'permissions': ADMINISTRATOR, 'position': 10},
+                *self.roles.values(),
+            ],
+            'channels': list(self.channels.values()),
+            'members': [
+                member_payload(BOT_USER_ID, roles=[BOT_ROLE_ID], bot=True),
+                member_payload(OWNER_USER_ID),
+            ],
+            'voice_states': [],
+            'emojis': [],
+            'stickers': [],
+            'features': [],
+            'threads': [],
+            'stage_instances': [],
+            'presences': [],
+        }
+
+    async def handle_gateway(self, request: web.Request) -> web.WebSocketResponse:
+        """Speak just enough of the gateway protocol: HELLO, IDENTIFY, READY, heartbeats"""
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        await ws.send_json({'op': 10, 'd': {'heartbeat_interval': 41250}})
+        self.sockets.append(ws)
+        try:
+            async for message in ws:
+                payload = json.loads(message.data)
+                op = payload.get('op')
+                if op == 1:
+                    await ws.send_json({'op': 11, 'd': None})
+                elif op == 2:
+                    await self._send_ready(ws)
+                    self.identified.set()
+        finally:
+            if ws in self.sockets:
+                self.sockets.remove(ws)
+        return ws
+
+    async def _send_ready(self, ws: web.WebSocketResponse):
+        await ws.send_json({'op': 0, 't': 'READY', 's': next(self.sequence), 'd': {
+            'v': 10,
+            'user': user_payload(BOT_USER_ID, bot=True),
+            'guilds': [{'id': str(GUILD_ID), 'unavailable': True}],
+            'session_id': 'fake-session',
+            'resume_gateway_url': f'ws://{self.host}:{self.port}/gateway',
+            'application': {'id': str(APPLICATION_ID), 'flags': 0},
+        }})
+        await ws.send_json({'op': 0, 't': 'GUILD_CREATE', 's': next(self.sequence), 'd': self.guild_payload()})
+
+    async def dispatch(self, event: str, data: Dict[str, Any]):
+        """Send a DISPATCH frame to every connected bot"""
+        frame = {'op': 0, 't': event, 's': next(self.sequence), 'd': data}
+        for ws in list(self.sockets):
+            await ws.send_json(frame)
+
+    # ------------------------------------------------------------------ correlation
+
+    def watch(self, kind: str, method: str, path_pattern: str, token: int):
+        """Expect a REST request matching method/path that mentions snowflake ``token``"""
+        self.watchers[str(token)] = (kind, method, re.compile(path_pattern), time.perf_counter())
+        self.sent[kind] += 1
+
+    def _match_watchers(self, method: str, path: str, body: str):
+        now = time.perf_counter()
+        for token in SNOWFLAKE.findall(path + ' ' + body):
+            watcher = self.watchers.get(token)
+            if watcher is None:
+                continue
+            kind, watch_method, pattern, started = watcher
+            if method == watch_method and pattern.search(path):
+                self.latencies[kind].append(now - started)
+                del self.watchers[token]
+                return
+
+    # ------------------------------------------------------------------ REST
+
+    def route(self, method: str, pattern: str):
+        """Register a REST handler; handlers receive (match, body) and return (status, json)"""
+        def decorator(func: Callable):
+            self.route_handlers.append((method, re.compile(f'^{pattern}$'), func))
+            return func
+        return decorator
+
+    async def handle_rest(self, request: web.Request) -> web.Response:
+        path = '/' + request.match_info['path']
+        raw = await request.text() if request.can_read_body else ''
+        body: Any = {}
+        if raw and request.content_type == 'application/json':
+            body = json.loads(raw)
+
+        if self.rest_latency:
+            await asyncio.sleep(self.rest_latency)
+
+        for method, pattern, handler in self.route_handlers:
+            match = pattern.match(path)
+            if method == request.method and match:
+                route_key = f'{method} {ROUTE_ID.sub("{id}", pattern.pattern[1:-1])}'
+                self.rest_calls[route_key] += 1
+                if route_key in self.route_latency:
+                    await asyncio.sleep(self.route_latency[route_key])
+                self._match_watchers(request.method, path, raw)
+                result = handler(match, body)
+                if asyncio.iscoroutine(result):
+                    result = await result
+                status, data = result
+                return self._json(status, data)
+
+        self.unknown_routes[f'{request.method} {path}'] += 1
+        return self._json(404, {'message': 'Unknown route', 'code': 0})
+
+    @staticmethod
+    def _json(status: int, data: Any) -> web.Response:
+        # discord.py only decodes bodies whose content-type is exactly application/json
+        if data is None:
+            return web.Response(status=status)
+        return web.Response(status=status, body=json.dumps(data).encode('utf-8'), headers={'Content-Type': 'application/json'})
+
+    def _message(self, channel_id: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'id': str(next(self.ids)),
+            'channel_id': channel_id,
+            'author': user_payload(BOT_USER_ID, bot=True),
+            'content': body.get('content') or '',
+            'timestamp': TIMESTAMP,
+            'edited_timestamp': None,
+            'tts': False,
+            'mention_everyone': False,
+            'mentions': [],
+            'mention_roles': [],
+            'attachments': [],
+            'embeds': body.get('embeds') or [],
+            'pinned': False,
+            'type': 0,
+        }
+
+    def _invite(self, code: str) -> Dict[str, Any]:
+        data = self.invites[code]
+        return {
+            'code': code,
+            'guild': {'id': str(GUILD_ID), 'name': 'Load Test Guild', 'features': []},
+            'channel': {'id': data['channel_id'], 'name': 'general', 'type': 0},
+            'inviter': user_payload(data.get('inviter_id', OWNER_USER_ID)),
+            'uses': data['uses'],
+            'max_uses': data['max_uses'],
+            'max_age': data['max_age'],
+            'temporary': False,
+            'created_at': TIMESTAMP,
+        }
+
+    def add_invite(self, code: str, max_uses: int = 0, max_age: int = 0, uses: int = 0,
+                   channel_id: int = TEXT_CHANNEL_ID):
+        """Seed an invite as if it had been created in the client"""
+        self.invites[code] = {
+            'uses': uses, 'max_uses': max_uses, 'max_age': max_age, 'channel_id': str(channel_id),
+        }
+
+    def add_guild_role(self, role_id: int, name: str, position: int = 1):
+        """Seed a role below the bot's own role; call before start()"""
+        self.roles[role_id] = {'id': str(role_id), 'name': name, 'permissions': '0', 'position': position}
+
+    def use_invite(self, code: str):
+        """Bump an invite's use count the way a join through it would"""
+        invite = self.invites[code]
+        invite['uses'] += 1
+        if invite['max_uses'] and invite['uses'] >= invite['max_uses']:
+            del self.invites[code]
+
+    def _register_routes(self):
+        route = self.route
+
+        @route('GET', '/users/@me')
+        def get_me(match, body):
+            return 200, user_payload(BOT_USER_ID, bot=True)
+
+        @route('GET', '/oauth2/applications/@me')
+        def get_application(match, body):
+            return 200, {
+                'id': str(APPLICATION_ID), 'name': 'Load Test', 'icon': None, 'description': '',
+                'bot_public': True, 'bot_require_code_grant': False, 'flags': 0,
+                'owner': user_payload(OWNER_USER_ID), 'verify_key': '', 'summary': '',
+            }
+
+        @route('GET', '/gateway/bot')
+        def get_gateway(match, body):
+            return 200, {'url': f'ws://{self.host}:{self.port}/gateway', 'shards': 1}
+
+        @route('PUT', r'/applications/\d+/commands')
+        def sync_commands(match, body):
+            return 200, []
+
+        @route('POST', r'/channels/(\d+)/messages')
+        def send_message(match, body):
+            return 200, self._message(match.group(1), body)
+
+        @route('DELETE', r'/channels/\d+/messages/\d+')
+        def delete_message(match, body):
+            return 204, None
+
+        @route('POST', r'/users/@me/channels')
+        def create_dm(match, body):
+            recipient = int(body.get('recipient_id', 0))
+            return 200, {'id': str(next(self.ids)), 'type': 1, 'recipients': [user_payload(recipient)]}
+
+        @route('POST', rf'/guilds/{GUILD_ID}/channels')
+        async def create_channel(match, body):
+            channel_id = next(self.ids)
+            data = channel_payload(
+                channel_id, body.get('name', 'channel'), body.get('type', 0),
+                parent_id=int(body['parent_id']) if body.get('parent_id') else None,
+                overwrites=body.get('permission_overwrites', []),
+            )
+            self.channels[channel_id] = data
+            await self.dispatch('CHANNEL_CREATE', data)
+            return 200, data
+
+        @route('PATCH', r'/channels/(\d+)')
+        async def edit_channel(match, body):
+            data = self.channels.get(int(match.group(1)))
+            if data is None:
+                return 404, {'message': 'Unknown Channel', 'code': 10003}
+            for key in ('name', 'user_limit', 'position', 'permission_overwrites'):
+                if key in body:
+                    data[key] = body[key]
+            await self.dispatch('CHANNEL_UPDATE', data)
+            return 200, data
+
+        @route('DELETE', r'/channels/(\d+)')
+        async def delete_channel(match, body):
+            data = self.channels.pop(int(match.group(1)), None)
+            if data is None:
+                return 404, {'message': 'Unknown Channel', 'code': 10003}
+            await self.dispatch('CHANNEL_DELETE', data)
+            return 200, data
+
+        @route('PUT', r'/channels/\d+/permissions/\d+')
+        def set_permissions(match, body):
+            return 204, None
+
+        @route('PATCH', rf'/guilds/{GUILD_ID}/members/(\d+)')
+        async def edit_member(match, body):
+            user_id = int(match.group(1))
+            if 'channel_id' in body:
+                await self.dispatch('VOICE_STATE_UPDATE', self.voice_state(user_id, body['channel_id']))
+            return 200, member_payload(user_id)
+
+        @route('PUT', rf'/guilds/{GUILD_ID}/members/(\d+)/roles/(\d+)')
+        def add_role(match, body):
+            self.member_roles[int(match.group(1))].add(int(match.group(2)))
+            return 204, None
+
+        @route('GET', rf'/guilds/{GUILD_ID}/invites')
+        def list_invites(match, body):
+            return 200, [self._invite(code) for code in self.invites]
+
+        @route('POST', r'/channels/(\d+)/invites')
+        def create_invite(match, body):
+            code = f'load{next(self.ids) % 10 ** 8}'
+            self.add_invite(code, body.get('max_uses', 0), body.get('max_age', 0), channel_id=int(match.group(1)))
+            return 200, self._invite(code)
+
+        @route('DELETE', r'/invites/(\w+)')
+        def delete_invite(match, body):
+            code = match.group(1)
+            if code not in self.invites:
+                return 404, {'message': 'Unknown Invite', 'code': 10006}
+            data = self._invite(code)
+            del self.invites[code]
+            return 200, data
+
+        # OAuth2 code grant used by the web dashboard
+        @route('POST', '/oauth2/token')
+        def exchange_code(match, body):
+            return 200, {
+                'access_token': f'fake-access-{next(self.ids)}', 'token_type': 'Bearer',
+                'expires_in': 604800, 'refresh_token': 'fake-refresh', 'scope': 'identify guilds',
+            }
+
+        @route('GET', '/users/@me/guilds')
+        def get_user_guilds(match, body):
+            return 200, [{
+                'id': str(GUILD_ID), 'name': 'Load Test Guild', 'icon': None,
+                'owner': False, 'permissions': ADMINISTRATOR, 'features': [],
+            }]
+
+    # ------------------------------------------------------------------ synthetic events
+
+    def voice_state(self, user_id: int, channel_id: Optional[int]) -> Dict[str, Any]:
+        """VOICE_STATE_UPDATE payload for a user joining/leaving a channel"""
+        return {
+            'guild_id': str(GUILD_ID),
+            'channel_id': str(channel_id) if channel_id else None,
+            'user_id': str(user_id),
+            'member': member_payload(user_id),
+            'session_id': f'voice-{user_id}',
+            'deaf': False, 'mute': False, 'self_deaf': False, 'self_mute': False,
+            'self_video': False, 'suppress': False, 'request_to_speak_timestamp': None,
+        }
+
+    def message_create(self, user_id: int, content: str) -> Dict[str, Any]:
+        """MESSAGE_CREATE payload for a user message in the text channel"""
+        return {
+            'id': str(next(self.ids)),
+            'channel_id': str(TEXT_CHANNEL_ID),
+            'guild_id': str(GUILD_ID),
+            'author': user_payload(user_id),
+            'member': {k: v for k, v in member_payload(user_id).items() if k != 'user'},
+            'content': content,
+            'timestamp': TIMESTAMP,
+            'edited_timestamp': None,
+            'tts': False,
+            'mention_everyone': False,
+            'mentions': [],
+            'mention_roles': [],
+            'attachments': [],
+            'embeds': [],
+            'pinned': False,
+            'type': 0,
+        }
+
+    def member_add(self, user_id: int) -> Dict[str, Any]:
+        """GUILD_MEMBER_ADD payload"""
+        data = member_payload(user_id)
+        data['guild_id'] = str(GUILD_ID)
+        return data
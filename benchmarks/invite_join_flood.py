@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Join-flood benchmark for InviteManager's batched invite reconciliation
+
+Seeds custom invites on benchmarks/fake_discord.py, replays a raid-sized burst
+of GUILD_MEMBER_ADD events (each preceded by the matching invite use, or a
+vanity join), deletes custom invites nobody joins through halfway in, and
+reports invite fetches, role adds, attribution accuracy against the ground
+truth and join-to-role latency.
+
+    python -m benchmarks.invite_join_flood --joins 500 --join-rate 100
+    python -m benchmarks.invite_join_flood --batch-window 0   # roughly one fetch per join
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import discord  # noqa: E402
+from discord.ext import commands  # noqa: E402
+
+from benchmarks.fake_discord import (  # noqa: E402
+    FIRST_USER_ID, GUILD_ID, OWNER_USER_ID, TEXT_CHANNEL_ID, FakeDiscord
+)
+from benchmarks.loadtest import latency_summary, sample_loop_lag  # noqa: E402
+
+FIRST_ROLE_ID = 910000000000000100
+
+
+def seed_invites(fake: FakeDiscord, args) -> Dict[str, Optional[int]]:
+    """Create roles and custom invites; returns code -> role id (None for plain invites)"""
+    roles = [FIRST_ROLE_ID + i for i in range(args.roles)]
+    for i, role_id in enumerate(roles):
+        fake.add_guild_role(role_id, f'Invite Role {i}', position=1 + i)
+
+    codes: Dict[str, Optional[int]] = {}
+    for i in range(args.invites):
+        code = f'raid{i:04d}'
+        fake.add_invite(code, max_uses=args.joins + 1)
+        codes[code] = roles[i % len(roles)]
+    # Deleted by hand mid-run with uses left; granting their role is always wrong
+    for i in range(args.deleted_invites):
+        role_id = FIRST_ROLE_ID + args.roles + i
+        fake.add_guild_role(role_id, f'Deleted Invite Role {i}', position=1 + args.roles + i)
+        code = f'gone{i:04d}'
+        fake.add_invite(code, max_uses=10, uses=3)
+        codes[code] = role_id
+    for i in range(args.plain_invites):
+        code = f'plain{i:04d}'
+        fake.add_invite(code)
+        codes[code] = None
+    if args.vanity_share:
+        fake.vanity_url_code = 'raidtest'
+    return codes
+
+
+def write_invites_file(codes: Dict[str, Optional[int]], args):
+    """invites.json in the format InviteManager persists"""
+    guild_invites = {
+        code: {
+            'role_id': role_id,
+            'uses': args.joins + 1,
+            'max_uses': args.joins + 1,
+            'creator_id': OWNER_USER_ID,
+            'created_at': '2024-01-01T00:00:00',
+            'expires_at': None,
+        }
+        for code, role_id in codes.items() if role_id is not None
+    }
+    with open('invites.json', 'w') as f:
+        json.dump({str(GUILD_ID): guild_invites}, f)
+
+
+def build_joins(codes: Dict[str, Optional[int]], args, rng: random.Random) -> List[tuple]:
+    """(user id, invite code or None for vanity) per join"""
+    code_list = [code for code in codes if not code.startswith('gone')]
+    joins = []
+    for i in range(args.joins):
+        code = None if rng.random() < args.vanity_share else rng.choice(code_list)
+        joins.append((FIRST_USER_ID + i, code))
+    return joins
+
+
+async def delete_invites(fake: FakeDiscord, codes: List[str]):
+    """Delete invites the way a moderator would, with the INVITE_DELETE event"""
+    for code in codes:
+        del fake.invites[code]
+        await fake.dispatch('INVITE_DELETE', {
+            'channel_id': str(TEXT_CHANNEL_ID), 'guild_id': str(GUILD_ID), 'code': code,
+        })
+
+
+async def replay_joins(fake: FakeDiscord, joins: List[tuple], codes: Dict[str, Optional[int]], args) -> float:
+    """Bump the invite and dispatch GUILD_MEMBER_ADD per join; runs on the fake server's loop"""
+    started = time.perf_counter()
+    paused = 0.0
+    deleted = [code for code in codes if code.startswith('gone')]
+    for i, (user_id, code) in enumerate(joins):
+        if deleted and i == len(joins) // 2:
+            # After a quiet spell, so the next join is attributed on its own within the delete grace
+            paused = args.batch_window + 1.0
+            await asyncio.sleep(paused)
+            await delete_invites(fake, deleted)
+        delay = started + paused + i / args.join_rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if code is not None:
+            fake.use_invite(code)
+            if codes[code] is not None:
+                fake.watch('role', 'PUT', rf'/guilds/{GUILD_ID}/members/\d+/roles/\d+$', user_id)
+        await fake.dispatch('GUILD_MEMBER_ADD', fake.member_add(user_id))
+    return time.perf_counter() - started
+
+
+async def run_bot(fake: FakeDiscord, args, codes: Dict[str, Optional[int]], joins: List[tuple]) -> Dict:
+    """Run a bot with only InviteManager loaded against the fake server"""
+    intents = discord.Intents.default()
+    intents.members = True
+    intents.invites = True
+    bot = commands.Bot(command_prefix='!', intents=intents)
+    bot_task = asyncio.create_task(bot.start('fake-token'))
+
+    ready_task = asyncio.create_task(bot.wait_until_ready())
+    await asyncio.wait({ready_task, bot_task}, timeout=30, return_when=asyncio.FIRST_COMPLETED)
+    if bot_task.done():
+        bot_task.result()  # re-raise the startup failure
+    if not ready_task.done():
+        raise TimeoutError("Bot did not become ready against the fake gateway")
+
+    await bot.load_extension('cog.invite_manager')
+    cog = bot.get_cog('InviteManager')
+    cog.JOIN_BATCH_WINDOW = args.batch_window
+    for _ in range(300):
+        if GUILD_ID in cog.invite_uses:
+            break
+        await asyncio.sleep(0.05)
+    fake.rest_calls.clear()
+
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(sample_loop_lag(lag_samples, 0.01, stop))
+
+    elapsed = await asyncio.wrap_future(
+        asyncio.run_coroutine_threadsafe(replay_joins(fake, joins, codes, args), fake.loop)
+    )
+
+    deadline = time.perf_counter() + args.drain
+    while (fake.watchers or cog.pending_joins or cog.join_flush_tasks) and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    stop.set()
+    await lag_task
+    await bot.close()
+    await asyncio.gather(bot_task, return_exceptions=True)
+
+    correct = wrong = missed = 0
+    for user_id, code in joins:
+        expected = codes.get(code) if code else None
+        granted = fake.member_roles.get(user_id, set())
+        if expected is None:
+            wrong += bool(granted)
+        elif granted == {expected}:
+            correct += 1
+        elif granted:
+            wrong += 1
+        else:
+            missed += 1
+
+    expected_roles = sum(1 for _, code in joins if code and codes[code] is not None)
+    return {
+        'duration_s': round(elapsed, 2),
+        'joins': len(joins),
+        'batch_window_s': args.batch_window,
+        'invite_fetches': fake.rest_calls['GET /guilds/{id}/invites'],
+        'role_adds': fake.rest_calls['PUT /guilds/{id}/members/{id}/roles/{id}'],
+        'attribution': {
+            'expected_roles': expected_roles,
+            'correct': correct,
+            'wrong': wrong,
+            'unattributed': missed,
+        },
+        'join_to_role': latency_summary(fake.latencies['role']),
+        'event_loop_lag': latency_summary(lag_samples),
+    }
+
+
+def print_report(results: Dict):
+    """Human-readable summary"""
+    attribution = results['attribution']
+    latency = results['join_to_role']
+    lag = results['event_loop_lag']
+    print(f"\n{results['joins']} joins replayed in {results['duration_s']}s "
+          f"(batch window {results['batch_window_s']}s)")
+    print(f"Invite fetches: {results['invite_fetches']}   role adds: {results['role_adds']}")
+    print(f"Attribution: {attribution['correct']}/{attribution['expected_roles']} correct, "
+          f"{attribution['wrong']} wrong, {attribution['unattributed']} unattributed")
+    print(f"Join to role: p50 {latency['p50_ms']}ms  p95 {latency['p95_ms']}ms  "
+          f"p99 {latency['p99_ms']}ms  max {latency['max_ms']}ms")
+    print(f"Event loop lag: p50 {lag['p50_ms']}ms  p99 {lag['p99_ms']}ms  max {lag['max_ms']}ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--joins', type=int, default=500, help='synthetic joins to replay')
+    parser.add_argument('--join-rate', type=float, default=100, help='GUILD_MEMBER_ADD events per second')
+    parser.add_argument('--invites', type=int, default=3, help='custom invites in use during the raid')
+    parser.add_argument('--roles', type=int, default=1, help='distinct roles handed out by the custom invites')
+    parser.add_argument('--deleted-invites', type=int, default=1,
+                        help='custom invites with uses left that are deleted halfway through')
+    parser.add_argument('--plain-invites', type=int, default=0, help='untracked invites also used by the raid')
+    parser.add_argument('--vanity-share', type=float, default=0.0, help='fraction of joins through the vanity URL')
+    parser.add_argument('--batch-window', type=float, default=1.0, help='InviteManager.JOIN_BATCH_WINDOW for the run')
+    parser.add_argument('--rest-latency-ms', type=float, default=0, help='artificial latency of every REST call')
+    parser.add_argument('--drain', type=float, default=30, help='max seconds to wait for outstanding role adds')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', help='also write results to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = os.path.abspath(args.json) if args.json else None
+    os.chdir(tempfile.mkdtemp(prefix='bot-joinflood-'))
+
+    fake = FakeDiscord(rest_latency=args.rest_latency_ms / 1000, seed=args.seed)
+    codes = seed_invites(fake, args)
+    write_invites_file(codes, args)
+    joins = build_joins(codes, args, random.Random(args.seed))
+    fake.start()
+    try:
+        results = asyncio.run(run_bot(fake, args, codes, joins))
+    finally:
+        fake.stop()
+
+    print_report(results)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
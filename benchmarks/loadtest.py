@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Offline load test for enhanced_bot.py and its cogs
+
+Runs the real commands.Bot against benchmarks/fake_discord.py, injects
+MESSAGE_CREATE, VOICE_STATE_UPDATE and GUILD_MEMBER_ADD events at fixed
+rates, and reports throughput, event-to-reply latency percentiles and
+event-loop lag. Needs no network access.
+
+    python -m benchmarks.loadtest --duration 30 --message-rate 50 --voice-rate 2 --join-rate 5
+
+Compare TempVoice with and without the warm pool of pre-created channels:
+
+    python -m benchmarks.loadtest --message-rate 0 --join-rate 0 --voice-rate 2 --channel-create-latency-ms 300
+    python -m benchmarks.loadtest --message-rate 0 --join-rate 0 --voice-rate 2 --channel-create-latency-ms 300 --warm-pool 5
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_discord import (  # noqa: E402
+    CATEGORY_ID,
+    FIRST_USER_ID,
+    GUILD_ID,
+    LOBBY_CHANNEL_ID,
+    FakeDiscord,
+)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/max in milliseconds"""
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        'max_ms': round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+def build_schedule(args, rng: random.Random) -> List[tuple]:
+    """Deterministic open-loop schedule of (offset seconds, kind)"""
+    schedule = []
+    for kind, rate in (('message', args.message_rate), ('voice', args.voice_rate), ('join', args.join_rate)):
+        if rate <= 0:
+            continue
+        phase = rng.random() / rate
+        for i in range(int(args.duration * rate)):
+            schedule.append((phase + i / rate, kind))
+    schedule.sort()
+    return schedule
+
+
+async def run_scenario(fake: FakeDiscord, args, schedule: List[tuple]):
+    """Send the scheduled events; runs on the fake server's loop"""
+    user_ids = iter(range(FIRST_USER_ID, FIRST_USER_ID + 10 ** 9))
+    leaves = []
+    started = time.perf_counter()
+
+    async def leave_later(user_id: int):
+        await asyncio.sleep(args.voice_hold)
+        await fake.dispatch('VOICE_STATE_UPDATE', fake.voice_state(user_id, None))
+
+    for offset, kind in schedule:
+        delay = started + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        user_id = next(user_ids)
+        if kind == 'message':
+            # !hello replies with a mention of the author
+            fake.watch('message', 'POST', r'/channels/\d+/messages$', user_id)
+            await fake.dispatch('MESSAGE_CREATE', fake.message_create(user_id, f'!{args.command}'))
+        elif kind == 'voice':
+            # TempVoice answers by moving the member into their new channel
+            fake.watch('voice', 'PATCH', rf'/guilds/{GUILD_ID}/members/\d+$', user_id)
+            await fake.dispatch('VOICE_STATE_UPDATE', fake.voice_state(user_id, LOBBY_CHANNEL_ID))
+            leaves.append(asyncio.create_task(leave_later(user_id)))
+        elif kind == 'join':
+            # enhanced_bot's welcome embed names the new member
+            fake.watch('join', 'POST', r'/channels/\d+/messages$', user_id)
+            await fake.dispatch('GUILD_MEMBER_ADD', fake.member_add(user_id))
+
+    elapsed = time.perf_counter() - started
+    if leaves:
+        await asyncio.gather(*leaves)
+    return elapsed
+
+
+async def sample_loop_lag(samples: List[float], interval: float, stop: asyncio.Event):
+    """Record event-loop lag on the bot's loop"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - started - interval))
+
+
+def prepare_workdir(args) -> str:
+    """Isolate JSON state files in a temp dir and point TempVoice at the lobby"""
+    workdir = tempfile.mkdtemp(prefix='bot-loadtest-')
+    os.chdir(workdir)
+    with open('tempvoice_config.json', 'w') as f:
+        defaults = {
+            "channel_name_template": "🎤 {user}'s Channel",
+            "max_channels_per_user": 3,
+            "delete_delay": args.voice_delete_delay,
+            "warm_pool_size": args.warm_pool,
+        }
+        guild = {"create_channel_id": LOBBY_CHANNEL_ID, "category_id": CATEGORY_ID, **defaults}
+        json.dump({"defaults": defaults, "guilds": {str(GUILD_ID): guild}}, f)
+    return workdir
+
+
+async def run_bot(fake: FakeDiscord, args) -> Dict:
+    """Start enhanced_bot against the fake server and drive the scenario"""
+    import enhanced_bot
+
+    bot = enhanced_bot.bot
+    bot.setup_hook = enhanced_bot.setup_optimizations
+    bot_task = asyncio.create_task(bot.start('fake-token'))
+
+    ready_task = asyncio.create_task(bot.wait_until_ready())
+    await asyncio.wait({ready_task, bot_task}, timeout=30, return_when=asyncio.FIRST_COMPLETED)
+    if bot_task.done():
+        bot_task.result()  # re-raise the startup failure
+    if not ready_task.done():
+        raise TimeoutError("Bot did not become ready against the fake gateway")
+    # Cogs are loaded from on_ready
+    for _ in range(300):
+        if bot.get_cog('TempVoice') and bot.get_cog('InviteManager'):
+            break
+        await asyncio.sleep(0.05)
+    # Let the TempVoice warm pool fill before measuring
+    tempvoice = bot.get_cog('TempVoice')
+    for _ in range(600):
+        if tempvoice is None or len(tempvoice.warm_pool.get(GUILD_ID, ())) >= args.warm_pool:
+            break
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(args.warmup)
+    fake.rest_calls.clear()
+
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(sample_loop_lag(lag_samples, 0.01, stop))
+
+    schedule = build_schedule(args, random.Random(args.seed))
+    elapsed = await asyncio.wrap_future(
+        asyncio.run_coroutine_threadsafe(run_scenario(fake, args, schedule), fake.loop)
+    )
+
+    # Let in-flight replies land
+    deadline = time.perf_counter() + args.drain
+    while fake.watchers and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    stop.set()
+    await lag_task
+    await bot.close()
+    await asyncio.gather(bot_task, return_exceptions=True)
+
+    results = {'duration_s': round(elapsed, 2), 'warm_pool': args.warm_pool, 'events': {}}
+    for kind in ('message', 'voice', 'join'):
+        if not fake.sent[kind]:
+            continue
+        latencies = fake.latencies[kind]
+        results['events'][kind] = {
+            'sent': fake.sent[kind],
+            'replied': len(latencies),
+            'throughput_per_s': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            **latency_summary(latencies),
+        }
+    results['event_loop_lag'] = latency_summary(lag_samples)
+    results['rest_calls'] = dict(fake.rest_calls.most_common())
+    if fake.unknown_routes:
+        results['unknown_routes'] = dict(fake.unknown_routes.most_common())
+    return results
+
+
+def print_report(results: Dict):
+    """Human-readable summary"""
+    print(f"\nLoad test finished in {results['duration_s']}s (TempVoice warm pool {results['warm_pool']})")
+    print(f"{'event':<10}{'sent':>8}{'replied':>9}{'per s':>9}{'p50':>12}{'p95':>12}{'p99':>12}{'max':>12}")
+    for kind, stats in results['events'].items():
+        print(f"{kind:<10}{stats['sent']:>8}{stats['replied']:>9}{stats['throughput_per_s']:>9}"
+              f"{stats['p50_ms']:>10}ms{stats['p95_ms']:>10}ms{stats['p99_ms']:>10}ms{stats['max_ms']:>10}ms")
+    lag = results['event_loop_lag']
+    print(f"\nEvent loop lag: p50 {lag['p50_ms']}ms  p99 {lag['p99_ms']}ms  max {lag['max_ms']}ms")
+    print("\nREST calls:")
+    for route, count in results['rest_calls'].items():
+        print(f"  {count:>6}  {route}")
+    for route, count in results.get('unknown_routes', {}).items():
+        print(f"  {count:>6}  UNHANDLED {route}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=30, help='seconds of load to generate')
+    parser.add_argument('--message-rate', type=float, default=50, help='MESSAGE_CREATE events per second')
+    parser.add_argument('--voice-rate', type=float, default=2, help='lobby joins (VOICE_STATE_UPDATE) per second')
+    parser.add_argument('--join-rate', type=float, default=5, help='GUILD_MEMBER_ADD events per second')
+    parser.add_argument('--command', default='hello', help='prefix command sent in messages (must mention the author)')
+    parser.add_argument('--voice-hold', type=float, default=2, help='seconds a voice user stays before leaving')
+    parser.add_argument('--voice-delete-delay', type=float, default=1, help='TempVoice delete_delay for the run')
+    parser.add_argument('--rest-latency-ms', type=float, default=0, help='artificial latency of every REST call')
+    parser.add_argument('--channel-create-latency-ms', type=float, default=0,
+                        help='extra latency of channel creation, which is slow and tightly limited on Discord')
+    parser.add_argument('--warm-pool', type=int, default=0, help='TempVoice warm_pool_size for the run')
+    parser.add_argument('--warmup', type=float, default=1, help='seconds to idle after cogs load')
+    parser.add_argument('--drain', type=float, default=10, help='max seconds to wait for outstanding replies')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--json', help='also write results to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = os.path.abspath(args.json) if args.json else None
+    os.environ.setdefault('METRICS_PORT', '0')
+    prepare_workdir(args)
+
+    fake = FakeDiscord(rest_latency=args.rest_latency_ms / 1000, seed=args.seed)
+    if args.channel_create_latency_ms:
+        fake.route_latency['POST /guilds/{id}/channels'] = args.channel_create_latency_ms / 1000
+    fake.start()
+    try:
+        results = asyncio.run(run_bot(fake, args))
+    finally:
+        fake.stop()
+
+    print_report(results)
+    if output:
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
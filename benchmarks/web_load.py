@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the web dashboard (web_server.py)
+
+Starts benchmarks/fake_discord.py as the Discord API, serves web_server:app
+with uvicorn in a subprocess pointed at it, and drives concurrent clients
+against a JSON endpoint and the OAuth callback. Reports requests per second
+and latency percentiles per endpoint.
+
+    python -m benchmarks.web_load --concurrency 50 --duration 10 --rest-latency-ms 100
+
+Point it at an already running server (e.g. the previous Flask build, started
+with DISCORD_API_BASE set to a fake) to compare:
+
+    python -m benchmarks.web_load --url http://127.0.0.1:5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.fake_discord import FakeDiscord  # noqa: E402
+from benchmarks.loadtest import latency_summary  # noqa: E402
+
+ENDPOINTS = {
+    'status': '/api/bot/status',
+    # Token exchange plus the user and guild lookups, then a session write
+    'oauth': '/auth/callback?code=benchmark',
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(fake: FakeDiscord, port: int, workdir: str) -> subprocess.Popen:
+    """Serve web_server:app with uvicorn against the fake Discord API"""
+    env = dict(
+        os.environ,
+        DISCORD_API_BASE=f'{fake.base_url}/api/v10',
+        SESSION_FILE_DIR=os.path.join(workdir, 'sessions'),
+        PYTHONPATH=REPO_ROOT,
+    )
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'web_server:app', '--host', '127.0.0.1',
+         '--port', str(port), '--log-level', 'warning'],
+        cwd=REPO_ROOT, env=env,
+    )
+
+
+async def wait_for_server(url: str, timeout: float = 30):
+    deadline = time.perf_counter() + timeout
+    async with aiohttp.ClientSession() as client:
+        while time.perf_counter() < deadline:
+            try:
+                async with client.get(url + ENDPOINTS['status']) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+    raise TimeoutError(f"Web server at {url} did not come up")
+
+
+async def drive(url: str, path: str, args) -> Dict:
+    """Closed-loop load: ``concurrency`` clients issuing requests back to back"""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + args.duration
+
+    async def client_loop(client: aiohttp.ClientSession):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with client.get(url + path, allow_redirects=False) as response:
+                    await response.read()
+                    if response.status >= 400:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_s': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        **latency_summary(latencies),
+    }
+
+
+async def run(url: str, args) -> Dict:
+    await wait_for_server(url)
+    results = {'url': url, 'concurrency': args.concurrency, 'endpoints': {}}
+    for name in args.endpoints:
+        results['endpoints'][name] = await drive(url, ENDPOINTS[name], args)
+    return results
+
+
+def print_report(results: Dict):
+    """Human-readable summary"""
+    print(f"\n{results['url']} with {results['concurrency']} concurrent clients")
+    print(f"{'endpoint':<10}{'requests':>10}{'errors':>8}{'per s':>10}{'p50':>12}{'p95':>12}{'p99':>12}{'max':>12}")
+    for name, stats in results['endpoints'].items():
+        print(f"{name:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['requests_per_s']:>10}"
+              f"{stats['p50_ms']:>10}ms{stats['p95_ms']:>10}ms{stats['p99_ms']:>10}ms{stats['max_ms']:>10}ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='benchmark this running server instead of starting one')
+    parser.add_argument('--concurrency', type=int, default=50, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per endpoint')
+    parser.add_argument('--endpoints', nargs='+', choices=sorted(ENDPOINTS), default=['status', 'oauth'])
+    parser.add_argument('--rest-latency-ms', type=float, default=100, help='latency of every fake Discord API call')
+    parser.add_argument('--json', help='also write results to this file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server: Optional[subprocess.Popen] = None
+    fake: Optional[FakeDiscord] = None
+    url = args.url
+    try:
+        if not url:
+            fake = FakeDiscord(rest_latency=args.rest_latency_ms / 1000)
+            fake.start()
+            port = free_port()
+            server = start_server(fake, port, tempfile.mkdtemp(prefix='bot-webload-'))
+            url = f'http://127.0.0.1:{port}'
+        results = asyncio.run(run(url.rstrip('/'), args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(10)
+        if fake is not None:
+            fake.stop()
+
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
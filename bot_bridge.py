@@ -0,0 +1,214 @@
+"""
+Bridges between the web server and the bot
+BotBridge reaches a bot running on another event loop in the same process; IpcBotBridge
+reaches a bot in another process over the DashboardIPC socket. Both serve reads from the
+latest snapshot the bot published and run named dashboard operations on the bot loop
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cog.dashboard_ipc import decode_frame, encode_frame, open_connection
+from cog.dashboard_operations import run_operation
+from cog.dashboard_state import EMPTY_SNAPSHOT, BotSnapshot
+
+logger = logging.getLogger('performance')
+
+
+class BridgeError(Exception):
+    """The bot could not answer a web request"""
+
+
+class BotUnavailable(BridgeError):
+    """No bot is attached or connected, or it has stopped"""
+
+
+class BridgeTimeout(BridgeError):
+    """The bot did not finish the call in time"""
+
+
+class SnapshotSource:
+    """Latest snapshot plus listeners called on the web loop when it changes"""
+
+    def __init__(self):
+        self._snapshot: BotSnapshot = EMPTY_SNAPSHOT
+        self.listeners: List[Callable[[BotSnapshot], None]] = []
+
+    @property
+    def snapshot(self) -> BotSnapshot:
+        """Latest published bot state"""
+        return self._snapshot
+
+    def add_listener(self, callback: Callable[[BotSnapshot], None]):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[BotSnapshot], None]):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def notify(self, snapshot: BotSnapshot):
+        for callback in list(self.listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error("Snapshot listener failed: %s", e)
+
+
+class BotBridge(SnapshotSource):
+    """Thread-safe access to a bot running on another event loop
+
+    The bot side calls ``attach`` from its own loop and subscribes ``publish``
+    to the DashboardState cog. Snapshots are immutable, so handing the
+    reference across threads needs no lock.
+    """
+
+    DEFAULT_TIMEOUT = 5.0
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+        self.bot = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.web_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        """Remember the web loop so listeners run there; the bot attaches itself"""
+        self.web_loop = asyncio.get_running_loop()
+
+    async def stop(self):
+        self.web_loop = None
+
+    def attach(self, bot):
+        """Bind to the bot; must be called from the bot's running loop"""
+        self.bot = bot
+        self.loop = asyncio.get_running_loop()
+
+    def publish(self, snapshot: BotSnapshot):
+        """DashboardState subscriber; runs on the bot loop"""
+        self._snapshot = snapshot
+        web_loop = self.web_loop
+        if web_loop is not None and self.listeners and not web_loop.is_closed():
+            web_loop.call_soon_threadsafe(self.notify, snapshot)
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, timeout: Optional[float] = None) -> Any:
+        """Await ``func(bot, *args)`` on the bot loop from the web loop"""
+        if self.loop is None or self.loop.is_closed() or not self.loop.is_running():
+            raise BotUnavailable("Bot is not running")
+
+        future = asyncio.run_coroutine_threadsafe(func(self.bot, *args), self.loop)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            raise BridgeTimeout(f"{getattr(func, '__name__', 'call')} timed out")
+
+    async def request(self, op: str, *args, timeout: Optional[float] = None) -> Any:
+        """Run the registered dashboard operation ``op`` on the bot loop"""
+        try:
+            return await self.call(run_operation, op, *args, timeout=timeout)
+        except LookupError as e:
+            raise BridgeError(str(e))
+
+
+class IpcBotBridge(SnapshotSource):
+    """Same interface as BotBridge for a bot in another process
+
+    Keeps one connection to the bot's DashboardIPC socket, reconnecting with
+    backoff. While disconnected the snapshot is EMPTY_SNAPSHOT, so the
+    dashboard reports the bot as offline instead of serving stale data.
+    """
+
+    DEFAULT_TIMEOUT = 5.0
+    RECONNECT_DELAY = 1.0
+    MAX_RECONNECT_DELAY = 10.0
+
+    def __init__(self, address: str, token: str = '', timeout: float = DEFAULT_TIMEOUT):
+        super().__init__()
+        self.address = address
+        self.token = token
+        self.timeout = timeout
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.ids = itertools.count(1)
+        self.task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Connect in the background; call from the web server's loop"""
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def run(self):
+        delay = self.RECONNECT_DELAY
+        while True:
+            try:
+                reader, writer = await open_connection(self.address)
+            except OSError:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+                continue
+
+            delay = self.RECONNECT_DELAY
+            logger.info("Connected to bot at %s", self.address)
+            try:
+                if self.token:
+                    writer.write(encode_frame({'type': 'hello', 'token': self.token}))
+                self.writer = writer
+                await self.read_frames(reader)
+            except (ConnectionError, asyncio.LimitOverrunError, ValueError) as e:
+                logger.warning("Bot IPC connection failed: %s", e)
+            finally:
+                self.disconnected()
+                writer.close()
+            await asyncio.sleep(delay)
+
+    async def read_frames(self, reader: asyncio.StreamReader):
+        while True:
+            line = await reader.readline()
+            if not line:
+                return
+            message = decode_frame(line)
+            if message.get('type') == 'snapshot':
+                self._snapshot = BotSnapshot.from_dict(message['data'], previous=self._snapshot)
+                self.notify(self._snapshot)
+            elif message.get('type') == 'reply':
+                future = self.pending.pop(message.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if message.get('ok'):
+                    future.set_result(message.get('result'))
+                else:
+                    future.set_exception(BridgeError(message.get('error', 'Bot error')))
+
+    def disconnected(self):
+        self.writer = None
+        if self._snapshot is not EMPTY_SNAPSHOT:
+            self._snapshot = EMPTY_SNAPSHOT
+            self.notify(self._snapshot)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(BotUnavailable("Lost connection to the bot"))
+        self.pending.clear()
+
+    async def request(self, op: str, *args, timeout: Optional[float] = None) -> Any:
+        """Run the dashboard operation ``op`` in the bot process"""
+        if self.writer is None:
+            raise BotUnavailable("Bot is not connected")
+
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(encode_frame({'type': 'request', 'id': request_id, 'op': op, 'args': list(args)}))
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise BridgeTimeout(f"{op} timed out")
+        finally:
+            self.pending.pop(request_id, None)
@@ -4,6 +4,8 @@ import json
 import os
 from datetime import datetime
 
+from cog.performance_optimizations import perf_monitor
+
 class CustomCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -22,7 +24,7 @@ class CustomCommands(commands.Cog):
     
     def save_commands(self):
         """Save custom commands to JSON file"""
-        with open(self.commands_file, 'w', encoding='utf-8') as f:
+        with perf_monitor.timed_write('custom_commands'), open(self.commands_file, 'w', encoding='utf-8') as f:
             json.dump(self.custom_commands, f, indent=4, ensure_ascii=False)
     
     def replace_variables(self, text, ctx):
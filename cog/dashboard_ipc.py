@@ -0,0 +1,185 @@
+"""
+Local IPC channel between the bot process and the web dashboard process
+Streams DashboardState snapshots to connected dashboards and answers their operation
+requests, as newline-delimited JSON over a Unix domain socket (loopback TCP on Windows)
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Optional, Set, Tuple
+
+from discord.ext import commands
+
+from cog.dashboard_operations import run_operation
+from cog.dashboard_state import BotSnapshot
+
+logger = logging.getLogger('performance')
+
+# Frames are single JSON lines; snapshots of large bots can be big
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+DEFAULT_ADDRESS = '127.0.0.1:8766' if sys.platform == 'win32' else 'unix:dashboard.sock'
+
+
+def ipc_address() -> Optional[str]:
+    """DASHBOARD_IPC_ADDRESS, or None when it is set to 'off'"""
+    address = os.getenv('DASHBOARD_IPC_ADDRESS', DEFAULT_ADDRESS).strip()
+    return None if address.lower() in ('', 'off') else address
+
+
+def parse_address(address: str) -> Tuple[str, Any]:
+    """'unix:/path/to.sock' -> ('unix', path); 'host:port' -> ('tcp', (host, port))"""
+    if address.startswith('unix:'):
+        return 'unix', address[len('unix:'):]
+    host, _, port = address.rpartition(':')
+    return 'tcp', (host or '127.0.0.1', int(port))
+
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def decode_frame(line: bytes) -> Dict[str, Any]:
+    return json.loads(line)
+
+
+async def open_connection(address: str):
+    """Client side of ``parse_address``"""
+    kind, target = parse_address(address)
+    if kind == 'unix':
+        return await asyncio.open_unix_connection(target, limit=MAX_FRAME_BYTES)
+    return await asyncio.open_connection(*target, limit=MAX_FRAME_BYTES)
+
+
+class DashboardIPC(commands.Cog):
+    """Serves dashboards running in another process
+
+    Server -> client frames: {"type": "snapshot", "data": ...} whenever the
+    state changes, and {"type": "reply", "id", "ok", "result"|"error"}.
+    Client -> server frames: {"type": "request", "id", "op", "args"}, after
+    a {"type": "hello", "token"} frame when DASHBOARD_IPC_TOKEN is set.
+    """
+
+    # Drop dashboards that stop reading instead of buffering without bound
+    MAX_CLIENT_BUFFER = 4 * 1024 * 1024
+    HELLO_TIMEOUT = 5.0
+
+    def __init__(self, bot, address: str):
+        self.bot = bot
+        self.address = address
+        self.token = os.getenv('DASHBOARD_IPC_TOKEN', '')
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.clients: Set[asyncio.StreamWriter] = set()
+        self.snapshot: Optional[BotSnapshot] = None
+
+    async def cog_load(self):
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            if os.path.exists(target):
+                os.remove(target)  # stale socket from a previous run
+            self.server = await asyncio.start_unix_server(self.handle_client, target, limit=MAX_FRAME_BYTES)
+            os.chmod(target, 0o600)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, *target, limit=MAX_FRAME_BYTES)
+        self.bot.get_cog('DashboardState').subscribe(self.publish)
+        logger.info("Dashboard IPC listening on %s", self.address)
+
+    async def cog_unload(self):
+        state = self.bot.get_cog('DashboardState')
+        if state is not None:
+            state.unsubscribe(self.publish)
+        if self.server is not None:
+            self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        self.clients.clear()
+        kind, target = parse_address(self.address)
+        if kind == 'unix' and os.path.exists(target):
+            os.remove(target)
+
+    def snapshot_frame(self, snapshot: BotSnapshot, include_commands: bool = True) -> bytes:
+        return encode_frame({'type': 'snapshot', 'data': snapshot.to_dict(include_commands)})
+
+    def publish(self, snapshot: BotSnapshot):
+        """DashboardState subscriber: encode once, fan out to every dashboard"""
+        # Connected dashboards already hold the catalog unless it was rebuilt
+        same_commands = self.snapshot is not None and snapshot.commands is self.snapshot.commands
+        self.snapshot = snapshot
+        if not self.clients:
+            return
+        frame = self.snapshot_frame(snapshot, include_commands=not same_commands)
+        for writer in list(self.clients):
+            self.send(writer, frame)
+
+    def send(self, writer: asyncio.StreamWriter, frame: bytes):
+        if writer.transport.get_write_buffer_size() > self.MAX_CLIENT_BUFFER:
+            logger.warning("Dropping dashboard IPC client that stopped reading")
+            self.clients.discard(writer)
+            writer.close()
+            return
+        writer.write(frame)
+
+    async def authenticate(self, reader: asyncio.StreamReader) -> bool:
+        if not self.token:
+            return True
+        try:
+            hello = decode_frame(await asyncio.wait_for(reader.readline(), self.HELLO_TIMEOUT))
+        except (asyncio.TimeoutError, ValueError):
+            return False
+        return hello.get('type') == 'hello' and hmac.compare_digest(str(hello.get('token', '')), self.token)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if not await self.authenticate(reader):
+            writer.close()
+            return
+
+        self.clients.add(writer)
+        if self.snapshot is not None:
+            self.send(writer, self.snapshot_frame(self.snapshot))
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = decode_frame(line)
+                except ValueError:
+                    continue
+                if message.get('type') == 'request':
+                    task = asyncio.create_task(self.handle_request(writer, message))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.clients.discard(writer)
+            writer.close()
+
+    async def handle_request(self, writer: asyncio.StreamWriter, message: Dict[str, Any]):
+        reply = {'type': 'reply', 'id': message.get('id')}
+        try:
+            reply['result'] = await run_operation(self.bot, message.get('op', ''), *message.get('args', []))
+            reply['ok'] = True
+        except Exception as e:
+            reply['ok'] = False
+            reply['error'] = str(e) or type(e).__name__
+        if writer in self.clients:
+            self.send(writer, encode_frame(reply))
+
+
+async def setup(bot):
+    address = ipc_address()
+    if address is None:
+        return
+    # Unix sockets are private to this user (0600); a TCP port is open to every local process
+    if parse_address(address)[0] == 'tcp' and not os.getenv('DASHBOARD_IPC_TOKEN'):
+        raise RuntimeError(f"DASHBOARD_IPC_TOKEN must be set to serve the dashboard on TCP address {address}")
+    if bot.get_cog('DashboardState') is None:
+        await bot.load_extension('cog.dashboard_state')
+    await bot.add_cog(DashboardIPC(bot, address))
@@ -0,0 +1,30 @@
+"""
+Operations the web dashboard may run on the bot loop
+Kept apart from the dashboard_state extension: load_extension executes a fresh copy of
+that module, which would give cogs and bridges registries of their own
+"""
+
+import inspect
+from typing import Any, Callable, Dict
+
+from discord.ext import commands
+
+# name -> func(bot, *args), sync or async, returning JSON-ready data
+OPERATIONS: Dict[str, Callable[..., Any]] = {}
+
+
+def register_operation(name: str, func: Callable[..., Any]):
+    """Expose ``func(bot, *args)`` to the dashboard under ``name``"""
+    OPERATIONS[name] = func
+
+
+async def run_operation(bot: commands.Bot, name: str, *args) -> Any:
+    """Run a registered operation on the bot loop"""
+    try:
+        func = OPERATIONS[name]
+    except KeyError:
+        raise LookupError(f"Unknown dashboard operation: {name}")
+    result = func(bot, *args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
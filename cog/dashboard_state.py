@@ -0,0 +1,624 @@
+"""
+Dashboard state published by the bot
+Builds immutable snapshots of the bot's status, guilds, commands, music players and temp
+voice channels on the bot loop and
+hands them to subscribers, so the web dashboard never touches live discord.py objects
+"""
+
+import inspect
+import os
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+from discord.ext import commands
+
+from cog.dashboard_operations import register_operation
+from cog.memory_diagnostics import register_structure
+
+
+def process_start_time() -> float:
+    """Unix time this process started; falls back to import time without /proc"""
+    try:
+        with open('/proc/self/stat') as f:
+            # Fields after the parenthesised command name start at field 3; starttime is field 22
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            system_uptime = float(f.read().split()[0])
+        return time.time() - system_uptime + start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.time()
+
+
+PROCESS_STARTED_AT = process_start_time()
+# Queue entries shipped per guild; the rest are only counted
+MUSIC_QUEUE_PREVIEW = 25
+
+
+@dataclass(frozen=True)
+class GuildSnapshot:
+    id: int
+    name: str
+    member_count: int
+    icon_url: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "member_count": self.member_count,
+            "icon_url": self.icon_url,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'GuildSnapshot':
+        return cls(int(data["id"]), data["name"], data["member_count"], data["icon_url"])
+
+
+@dataclass(frozen=True)
+class CommandSnapshot:
+    name: str
+    usage: str
+    description: str
+    aliases: Tuple[str, ...]
+    permissions: Tuple[str, ...]
+    examples: Tuple[str, ...]
+    category: str
+    type: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CommandSnapshot':
+        return cls(**{
+            key: tuple(value) if isinstance(value, list) else value
+            for key, value in data.items()
+        })
+
+
+@dataclass(frozen=True)
+class TrackSnapshot:
+    title: str
+    url: str
+    duration: int
+    requester: str
+    artist: Optional[str] = None
+    thumbnail: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TrackSnapshot':
+        return cls(**data)
+
+
+@dataclass(frozen=True)
+class MusicSnapshot:
+    guild_id: int
+    state: str = "idle"  # "playing", "paused" or "idle"
+    current: Optional[TrackSnapshot] = None
+    queue: Tuple[TrackSnapshot, ...] = ()
+    queue_length: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        # currentTrack is the key js/dashboard.js reads
+        return {
+            "guild_id": str(self.guild_id),
+            "state": self.state,
+            "currentTrack": self.current.to_dict() if self.current else None,
+            "queue": [track.to_dict() for track in self.queue],
+            "queue_length": self.queue_length,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'MusicSnapshot':
+        current = data.get("currentTrack")
+        return cls(
+            guild_id=int(data["guild_id"]),
+            state=data["state"],
+            current=TrackSnapshot.from_dict(current) if current else None,
+            queue=tuple(TrackSnapshot.from_dict(track) for track in data["queue"]),
+            queue_length=data["queue_length"],
+        )
+
+
+@dataclass(frozen=True)
+class BotSnapshot:
+    ready: bool = False
+    guilds: Tuple[GuildSnapshot, ...] = ()
+    commands: Tuple[CommandSnapshot, ...] = ()
+    user_count: int = 0
+    started_at: Optional[float] = None
+    # (shard id, state) pairs; state is "connected", "resumed" or "disconnected"
+    shards: Tuple[Tuple[int, str], ...] = ()
+    # Guilds with an active or queued music player
+    music: Tuple[MusicSnapshot, ...] = ()
+    # (guild id, open temp voice channels) pairs
+    tempvoice: Tuple[Tuple[int, int], ...] = ()
+    published_at: float = field(default_factory=time.time)
+    guild_index: Dict[int, GuildSnapshot] = field(init=False, repr=False, compare=False)
+    music_index: Dict[int, MusicSnapshot] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'guild_index', {guild.id: guild for guild in self.guilds})
+        object.__setattr__(self, 'music_index', {player.guild_id: player for player in self.music})
+
+    def to_dict(self, include_commands: bool = True) -> Dict[str, Any]:
+        """JSON-ready form, for shipping to another process
+
+        The command catalog rarely changes, so senders may leave it out and
+        let the receiver keep the one it already has.
+        """
+        data = {
+            "ready": self.ready,
+            "guilds": [guild.to_dict() for guild in self.guilds],
+            "user_count": self.user_count,
+            "started_at": self.started_at,
+            "shards": [list(shard) for shard in self.shards],
+            "music": [player.to_dict() for player in self.music],
+            "tempvoice": [list(entry) for entry in self.tempvoice],
+            "published_at": self.published_at,
+        }
+        if include_commands:
+            data["commands"] = [command.to_dict() for command in self.commands]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], previous: Optional['BotSnapshot'] = None) -> 'BotSnapshot':
+        if "commands" in data:
+            catalog = tuple(CommandSnapshot.from_dict(command) for command in data["commands"])
+        else:
+            catalog = previous.commands if previous else ()
+        return cls(
+            ready=data["ready"],
+            guilds=tuple(GuildSnapshot.from_dict(guild) for guild in data["guilds"]),
+            commands=catalog,
+            user_count=data["user_count"],
+            started_at=data["started_at"],
+            shards=tuple((shard_id, state) for shard_id, state in data["shards"]),
+            music=tuple(MusicSnapshot.from_dict(player) for player in data["music"]),
+            tempvoice=tuple((guild_id, count) for guild_id, count in data["tempvoice"]),
+            published_at=data["published_at"],
+        )
+
+    def guild(self, guild_id: int) -> Optional[GuildSnapshot]:
+        """Snapshot of one guild, None if the bot is not in it"""
+        return self.guild_index.get(guild_id)
+
+    def player(self, guild_id: int) -> MusicSnapshot:
+        """Music state of one guild; idle if nothing is playing or queued"""
+        return self.music_index.get(guild_id) or MusicSnapshot(guild_id)
+
+
+# Published before the bot has connected
+EMPTY_SNAPSHOT = BotSnapshot()
+
+
+def snapshot_guild(guild: discord.Guild) -> GuildSnapshot:
+    return GuildSnapshot(
+        id=guild.id,
+        name=guild.name,
+        member_count=guild.member_count or 0,
+        icon_url=str(guild.icon.url) if guild.icon else None,
+    )
+
+
+def permission_name(name: str) -> str:
+    """'kick_members' -> 'Kick Members'"""
+    return name.replace('_', ' ').title()
+
+
+def check_labels(check: Callable) -> List[str]:
+    """Readable requirements of a command check (predicates are closures, not names)"""
+    name = getattr(check, '__qualname__', '').split('.<locals>')[0]
+    if name.endswith('_permissions'):
+        perms = inspect.getclosurevars(check).nonlocals.get('perms', {})
+        return [permission_name(perm) for perm, value in perms.items() if value]
+    return [permission_name(name)] if name and name != '<lambda>' else []
+
+
+def snapshot_track(song: Dict[str, Any]) -> TrackSnapshot:
+    return TrackSnapshot(
+        title=song.get('title', 'Unknown'),
+        url=song.get('url', ''),
+        duration=song.get('duration') or 0,
+        requester=song.get('requester', ''),
+        artist=song.get('artist'),
+        thumbnail=song.get('thumbnail'),
+    )
+
+
+def snapshot_music(bot: commands.Bot, guild_id: int) -> Optional[MusicSnapshot]:
+    """MusicCog state of a guild, None when it has no player and an empty queue"""
+    music = bot.get_cog('MusicCog')
+    if music is None:
+        return None
+    current = music.current_songs.get(guild_id)
+    queue = music.queue.get(guild_id) or []
+    if current is None and not queue:
+        return None
+
+    guild = bot.get_guild(guild_id)
+    voice_client = guild.voice_client if guild else None
+    if voice_client is not None and voice_client.is_paused():
+        state = "paused"
+    elif current is not None:
+        state = "playing"
+    else:
+        state = "idle"
+    return MusicSnapshot(
+        guild_id=guild_id,
+        state=state,
+        current=snapshot_track(current) if current else None,
+        queue=tuple(snapshot_track(song) for song in queue[:MUSIC_QUEUE_PREVIEW]),
+        queue_length=len(queue),
+    )
+
+
+def snapshot_commands(bot: commands.Bot) -> Tuple[CommandSnapshot, ...]:
+    """Prefix and slash command catalog as shown on the dashboard"""
+    catalog: List[CommandSnapshot] = []
+    for command in bot.commands:
+        if not command.hidden:
+            labels = [label for check in command.checks for label in check_labels(check)]
+            catalog.append(CommandSnapshot(
+                name=command.name,
+                usage=f"!{command.name} {command.signature}",
+                description=command.help or "No description",
+                aliases=tuple(command.aliases),
+                permissions=tuple(labels) or ("Send Messages",),
+                examples=(f"!{command.name}",),
+                category="basic",
+                type="prefix",
+            ))
+
+    for command in bot.tree.get_commands():
+        default_permissions = getattr(command, 'default_permissions', None)
+        labels = [permission_name(perm) for perm, value in default_permissions if value] if default_permissions else []
+        catalog.append(CommandSnapshot(
+            name=f"/{command.name}",
+            usage=f"/{command.name}",
+            description=getattr(command, 'description', None) or "No description",
+            aliases=(),
+            permissions=tuple(labels) or ("Send Messages",),
+            examples=(f"/{command.name}",),
+            category="slash",
+            type="slash",
+        ))
+    return tuple(catalog)
+
+
+class PermissionCache:
+    """(user id, guild id) -> is administrator, LRU-bounded, invalidated by member and role events"""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self.entries: OrderedDict = OrderedDict()
+        self.users_by_guild: Dict[int, Set[int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, guild_id: int) -> Optional[bool]:
+        key = (user_id, guild_id)
+        if key not in self.entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, user_id: int, guild_id: int, is_admin: bool):
+        self.entries[(user_id, guild_id)] = is_admin
+        self.entries.move_to_end((user_id, guild_id))
+        self.users_by_guild.setdefault(guild_id, set()).add(user_id)
+        while len(self.entries) > self.max_entries:
+            (old_user, old_guild), _ = self.entries.popitem(last=False)
+            self.discard_index(old_user, old_guild)
+
+    def discard_index(self, user_id: int, guild_id: int):
+        users = self.users_by_guild.get(guild_id)
+        if users is not None:
+            users.discard(user_id)
+            if not users:
+                del self.users_by_guild[guild_id]
+
+    def invalidate(self, user_id: int, guild_id: int):
+        if self.entries.pop((user_id, guild_id), None) is not None:
+            self.discard_index(user_id, guild_id)
+
+    def invalidate_guild(self, guild_id: int):
+        for user_id in self.users_by_guild.pop(guild_id, ()):
+            self.entries.pop((user_id, guild_id), None)
+
+
+def is_guild_admin(guild: discord.Guild, user_id: int) -> bool:
+    member = guild.get_member(user_id)
+    return bool(member and member.guild_permissions.administrator)
+
+
+def admin_guild_ids(bot: commands.Bot, user_id: int, guild_ids: Optional[Iterable[int]] = None) -> List[int]:
+    """Of ``guild_ids`` (default: every guild), those where the user is an administrator
+
+    Call on the bot loop. Answers come from DashboardState's permission cache when loaded.
+    """
+    state = bot.get_cog('DashboardState')
+    cache = state.permissions if state is not None else None
+    if guild_ids is None:
+        guild_ids = [guild.id for guild in bot.guilds]
+
+    admin_ids = []
+    for guild_id in guild_ids:
+        is_admin = cache.get(user_id, guild_id) if cache is not None else None
+        if is_admin is None:
+            guild = bot.get_guild(guild_id)
+            if guild is None:
+                continue
+            is_admin = is_guild_admin(guild, user_id)
+            if cache is not None:
+                cache.put(user_id, guild_id, is_admin)
+        if is_admin:
+            admin_ids.append(guild_id)
+    return admin_ids
+
+
+register_operation('admin_guild_ids', admin_guild_ids)
+
+
+class DashboardState(commands.Cog):
+    """Publishes BotSnapshot objects to subscribers whenever dashboard data changes"""
+
+    # Seconds to coalesce bursts of changes (member floods) into one snapshot
+    PUBLISH_DELAY = 0.5
+    # Bot methods after which the command catalog is rebuilt
+    EXTENSION_METHODS = ('load_extension', 'unload_extension', 'reload_extension')
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.snapshot: BotSnapshot = EMPTY_SNAPSHOT
+        self.subscribers: List[Callable[[BotSnapshot], None]] = []
+        self.publish_handle = None
+        # Commands only change with extensions, so the catalog is kept between snapshots
+        self.commands = snapshot_commands(bot)
+        # Running aggregates, updated per event instead of walking every guild per publish
+        self.guilds: Dict[int, GuildSnapshot] = {}
+        self.member_total = 0
+        self.shards: Dict[int, str] = {}
+        self.music: Dict[int, MusicSnapshot] = {}
+        self.tempvoice: Dict[int, int] = {}
+        self.permissions = PermissionCache()
+        register_structure('dashboard.permission_cache', lambda: self.permissions.entries)
+        self.wrap_extension_methods()
+        if bot.is_ready():
+            # Loaded late: connection events already happened
+            shard_ids = bot.shards if self.is_sharded() else [bot.shard_id or 0]
+            self.shards = {shard_id: "connected" for shard_id in shard_ids}
+            self.seed_guilds()
+            self.seed_cog_state()
+            self.publish()
+
+    def cog_unload(self):
+        if self.publish_handle is not None:
+            self.publish_handle.cancel()
+            self.publish_handle = None
+        for name in self.EXTENSION_METHODS:
+            self.bot.__dict__.pop(name, None)
+
+    def wrap_extension_methods(self):
+        """Rebuild the catalog whenever an extension is loaded, unloaded or reloaded"""
+        for name in self.EXTENSION_METHODS:
+            original = getattr(type(self.bot), name).__get__(self.bot)
+
+            async def wrapper(*args, _original=original, **kwargs):
+                try:
+                    return await _original(*args, **kwargs)
+                finally:
+                    self.refresh_commands()
+
+            setattr(self.bot, name, wrapper)
+
+    def refresh_commands(self):
+        """Rebuild the command catalog and publish it if it changed"""
+        if self.bot.get_cog(self.qualified_name) is not self:
+            return  # this cog was the one unloaded
+        catalog = snapshot_commands(self.bot)
+        if catalog != self.commands:
+            self.commands = catalog
+            self.schedule_publish()
+
+    def subscribe(self, callback: Callable[[BotSnapshot], None]):
+        """Call ``callback`` on the bot loop with every new snapshot, starting with the current one"""
+        self.subscribers.append(callback)
+        callback(self.snapshot)
+
+    def unsubscribe(self, callback: Callable[[BotSnapshot], None]):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def seed_guilds(self):
+        """Full walk of the guild cache; only on ready, everything later is incremental"""
+        self.guilds = {guild.id: snapshot_guild(guild) for guild in self.bot.guilds}
+        self.member_total = sum(guild.member_count for guild in self.guilds.values())
+
+    def seed_cog_state(self):
+        """Pick up music and temp voice state of cogs loaded before this one"""
+        music = self.bot.get_cog('MusicCog')
+        if music is not None:
+            for guild_id in set(music.queue) | set(music.current_songs):
+                self.update_music(guild_id, publish=False)
+        tempvoice = self.bot.get_cog('TempVoice')
+        if tempvoice is not None:
+            self.tempvoice = {guild_id: count for guild_id, count in tempvoice.guild_channel_counts.items()
+                              if guild_id and count}
+
+    def update_music(self, guild_id: int, publish: bool = True):
+        player = snapshot_music(self.bot, guild_id)
+        if player is None:
+            self.music.pop(guild_id, None)
+        else:
+            self.music[guild_id] = player
+        if publish:
+            self.schedule_publish()
+
+    def put_guild(self, guild: discord.Guild):
+        """Add or refresh one guild and adjust the member total"""
+        previous = self.guilds.get(guild.id)
+        current = snapshot_guild(guild)
+        self.guilds[guild.id] = current
+        self.member_total += current.member_count - (previous.member_count if previous else 0)
+        self.schedule_publish()
+
+    def drop_guild(self, guild_id: int):
+        self.permissions.invalidate_guild(guild_id)
+        previous = self.guilds.pop(guild_id, None)
+        if previous is not None:
+            self.member_total -= previous.member_count
+            self.schedule_publish()
+
+    def update_member_count(self, guild: Optional[discord.Guild]):
+        """discord.py keeps guild.member_count current; apply the delta"""
+        previous = self.guilds.get(guild.id) if guild else None
+        if previous is None or guild.member_count is None or guild.member_count == previous.member_count:
+            return
+        self.guilds[guild.id] = replace(previous, member_count=guild.member_count)
+        self.member_total += guild.member_count - previous.member_count
+        self.schedule_publish()
+
+    def set_shard_state(self, shard_id: Optional[int], state: str):
+        self.shards[shard_id or 0] = state
+        self.schedule_publish()
+
+    def build_snapshot(self) -> BotSnapshot:
+        return BotSnapshot(
+            ready=self.bot.is_ready(),
+            guilds=tuple(self.guilds.values()),
+            commands=self.commands,
+            user_count=self.member_total,
+            started_at=PROCESS_STARTED_AT,
+            shards=tuple(sorted(self.shards.items())),
+            music=tuple(self.music.values()),
+            tempvoice=tuple(self.tempvoice.items()),
+        )
+
+    def publish(self):
+        """Rebuild the snapshot now and hand it to every subscriber"""
+        if self.publish_handle is not None:
+            self.publish_handle.cancel()
+            self.publish_handle = None
+        self.snapshot = self.build_snapshot()
+        for callback in list(self.subscribers):
+            try:
+                callback(self.snapshot)
+            except Exception as e:
+                print(f"Dashboard subscriber failed: {e}")
+
+    def schedule_publish(self):
+        """Publish after PUBLISH_DELAY unless a publish is already pending"""
+        if self.publish_handle is None:
+            self.publish_handle = self.bot.loop.call_later(self.PUBLISH_DELAY, self.publish)
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.commands = snapshot_commands(self.bot)
+        self.seed_guilds()
+        self.seed_cog_state()
+        self.publish()
+
+    # Custom events dispatched by MusicCog and TempVoice
+    @commands.Cog.listener()
+    async def on_music_update(self, guild_id):
+        self.update_music(guild_id)
+
+    @commands.Cog.listener()
+    async def on_tempvoice_update(self, guild_id, channels):
+        if guild_id is None:
+            return  # legacy record without a guild
+        if channels:
+            self.tempvoice[guild_id] = channels
+        else:
+            self.tempvoice.pop(guild_id, None)
+        self.schedule_publish()
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self.put_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.drop_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        self.put_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        if before.owner_id != after.owner_id:
+            # Owners are implicit administrators
+            self.permissions.invalidate(before.owner_id, after.id)
+            self.permissions.invalidate(after.owner_id, after.id)
+        if before.name != after.name or before.icon != after.icon:
+            self.put_guild(after)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self.permissions.invalidate(after.id, after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.permissions != after.permissions:
+            self.permissions.invalidate_guild(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.permissions.invalidate_guild(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.permissions.invalidate(member.id, member.guild.id)
+        self.update_member_count(member.guild)
+
+    @commands.Cog.listener()
+    async def on_raw_member_remove(self, payload):
+        # The raw event also fires for members that were never cached
+        self.permissions.invalidate(payload.user.id, payload.guild_id)
+        self.update_member_count(self.bot.get_guild(payload.guild_id))
+
+    # Non-sharded bots only get the plain connection events
+    def is_sharded(self) -> bool:
+        return isinstance(self.bot, discord.AutoShardedClient)
+
+    @commands.Cog.listener()
+    async def on_connect(self):
+        if not self.is_sharded():
+            self.set_shard_state(self.bot.shard_id, "connected")
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        if not self.is_sharded():
+            self.set_shard_state(self.bot.shard_id, "resumed")
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        if not self.is_sharded():
+            self.set_shard_state(self.bot.shard_id, "disconnected")
+
+    @commands.Cog.listener()
+    async def on_shard_connect(self, shard_id):
+        self.set_shard_state(shard_id, "connected")
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id):
+        self.set_shard_state(shard_id, "resumed")
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id):
+        self.set_shard_state(shard_id, "disconnected")
+
+
+async def setup(bot):
+    await bot.add_cog(DashboardState(bot))
@@ -3,15 +3,73 @@ from discord.ext import commands
 import json
 import os
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
+from collections import deque
 import asyncio
+import heapq
+import time
+
+from cog.invite_registry import InviteRegistry
+from cog.metrics_exporter import MetricFamily, register_collector, unregister_collector
+from cog.performance_optimizations import perf_monitor
+
+class ListInvitesFlags(commands.FlagConverter, prefix='--', delimiter=' '):
+    role: Optional[discord.Role] = None
+    creator: Optional[discord.Member] = None
+
 
 class InviteManager(commands.Cog):
+    # Seconds a deleted invite is kept around for join attribution
+    INVITE_DELETE_GRACE = 10
+    # During a burst, joins closer together than this share one invite fetch
+    JOIN_BATCH_WINDOW = 1.0
+    # Joins within one window that count as a burst; below this each join is diffed on its own
+    JOIN_BURST_THRESHOLD = 10
+    # Concurrent role adds per batch; discord.py still enforces bucket limits
+    ROLE_ADD_CONCURRENCY = 5
+    # Guilds whose invites are fetched at once during startup warmup
+    WARMUP_CONCURRENCY = 8
+    # Backoff before re-fetching invites of a guild that refused (no Manage Guild)
+    FETCH_RETRY_DELAY = 300
+    FETCH_RETRY_MAX_DELAY = 3600
+    # Custom invites a single member may have open per guild
+    MAX_INVITES_PER_CREATOR = 25
+    # Longest the expiry scheduler sleeps before re-checking the wall clock
+    EXPIRY_MAX_SLEEP = 300
+    # Pause before retrying a purge whose save failed
+    EXPIRY_RETRY_DELAY = 30
+
     def __init__(self, bot):
         self.bot = bot
         self.invites_file = 'invites.json'
-        self.custom_invites = self.load_invites()
-        self.bot.loop.create_task(self.setup_invite_tracking())
+        self.custom_invites = InviteRegistry(self.load_invites())
+        # guild_id -> {code: (uses, max_uses)} as of the last fetch
+        self.invite_uses: Dict[int, Dict[str, Tuple[int, int]]] = {}
+        self.deleted_invites: Dict[int, Dict[str, Tuple[int, int]]] = {}
+        self.invite_locks: Dict[int, asyncio.Lock] = {}
+        self.pending_joins: Dict[int, List[discord.Member]] = {}
+        self.join_flush_tasks: Dict[int, asyncio.Task] = {}
+        self.recent_joins: Dict[int, deque] = {}
+        self.unclaimed_uses: Dict[int, Dict[str, int]] = {}
+        # Guilds with a trustworthy snapshot; joins elsewhere trigger an on-demand one
+        self.ready_guilds: set = set()
+        # guild_id -> (retry_at, delay) for guilds whose invites could not be fetched
+        self.failed_guilds: Dict[int, Tuple[float, float]] = {}
+        self.warmup = {'guilds': 0, 'warmed': 0, 'failed': 0, 'started_at': None, 'finished_at': None}
+        self.warmup_task = self.bot.loop.create_task(self.setup_invite_tracking())
+        # Min-heap of (expires_at, guild_id, code); stale entries are skipped when popped
+        self.expiry_heap: List[Tuple[float, str, str]] = []
+        self.expiry_wakeup = asyncio.Event()
+        self.build_expiry_heap()
+        self.expiry_task = self.bot.loop.create_task(self.run_expiry_scheduler())
+        register_collector(self.collect_warmup_metrics)
+
+    def cog_unload(self):
+        unregister_collector(self.collect_warmup_metrics)
+        self.warmup_task.cancel()
+        self.expiry_task.cancel()
+        for task in self.join_flush_tasks.values():
+            task.cancel()
 
     def load_invites(self) -> Dict[str, Dict[str, Any]]:
         """Load custom invites from JSON file"""
@@ -25,79 +83,454 @@ class InviteManager(commands.Cog):
 
     def save_invites(self):
         """Save custom invites to JSON file"""
-        with open(self.invites_file, 'w') as f:
-            json.dump(self.custom_invites, f, indent=2, default=str)
+        with perf_monitor.timed_write('invites'), open(self.invites_file, 'w') as f:
+            json.dump(self.custom_invites.to_dict(), f, indent=2, default=str)
+
+    @staticmethod
+    def invite_expiry(data: Dict[str, Any]) -> Optional[float]:
+        """Unix time a custom invite expires at, None if it never does"""
+        if not data.get('age') or not data.get('created_at'):
+            return None
+        try:
+            created_at = datetime.fromisoformat(str(data['created_at']))
+        except ValueError:
+            return None
+        return created_at.timestamp() + data['age']
+
+    def build_expiry_heap(self):
+        """Index every stored invite by expiry time"""
+        self.expiry_heap = []
+        for guild_id, invites in self.custom_invites.items():
+            for code, data in invites.items():
+                expires_at = self.invite_expiry(data)
+                if expires_at is not None:
+                    self.expiry_heap.append((expires_at, guild_id, code))
+        heapq.heapify(self.expiry_heap)
+
+    def schedule_expiry(self, guild_id: str, code: str, data: Dict[str, Any]):
+        """Add a new invite to the expiry heap and wake the scheduler if it expires first"""
+        expires_at = self.invite_expiry(data)
+        if expires_at is None:
+            return
+        heapq.heappush(self.expiry_heap, (expires_at, guild_id, code))
+        if self.expiry_heap[0][0] == expires_at:
+            self.expiry_wakeup.set()
+
+    def pop_expired(self, now: float) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Remove every invite expired by ``now`` from memory"""
+        expired = []
+        while self.expiry_heap and self.expiry_heap[0][0] <= now:
+            expires_at, guild_id, code = heapq.heappop(self.expiry_heap)
+            data = self.custom_invites.get(guild_id, code)
+            # Entry of an invite deleted or re-created since it was scheduled
+            if data is None or self.invite_expiry(data) != expires_at:
+                continue
+            self.custom_invites.remove(guild_id, code)
+            expired.append((guild_id, code, data))
+        return expired
+
+    def purge_expired(self) -> bool:
+        """Drop expired invites, save once and announce them; False if the save failed"""
+        expired = self.pop_expired(time.time())
+        if not expired:
+            return True
+        try:
+            self.save_invites()
+        except Exception as e:
+            # Put the batch back so the purge is retried instead of lost
+            print(f"Error saving expired invites, retrying in {self.EXPIRY_RETRY_DELAY}s: {e}")
+            for guild_id, code, data in expired:
+                self.custom_invites.add(guild_id, code, data)
+                heapq.heappush(self.expiry_heap, (self.invite_expiry(data), guild_id, code))
+            return False
+        for guild_id, code, data in expired:
+            self.bot.dispatch('invite_expired', int(guild_id), code, data)
+        return True
+
+    async def run_expiry_scheduler(self):
+        """Purge custom invites as they expire, one save per batch"""
+        while True:
+            self.expiry_wakeup.clear()
+            try:
+                purged = self.purge_expired()
+            except Exception as e:
+                print(f"Error in invite expiry scheduler: {e}")
+                purged = False
+
+            if not purged:
+                timeout = self.EXPIRY_RETRY_DELAY
+            else:
+                timeout = self.EXPIRY_MAX_SLEEP
+                if self.expiry_heap:
+                    timeout = min(timeout, max(0.0, self.expiry_heap[0][0] - time.time()))
+            try:
+                await asyncio.wait_for(self.expiry_wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def select_invites(self, guild_id: str, role: Optional[discord.Role] = None,
+                       creator: Optional[discord.abc.User] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Custom invites of a guild, optionally narrowed by role and/or creator via the indexes"""
+        if role is None and creator is None:
+            return list(self.custom_invites.guild(guild_id).items())
+        codes = None
+        if role is not None:
+            codes = self.custom_invites.codes_by('role_id', guild_id, role.id)
+        if creator is not None:
+            by_creator = self.custom_invites.codes_by('creator_id', guild_id, creator.id)
+            codes = by_creator if codes is None else codes & by_creator
+        invites = self.custom_invites.guild(guild_id)
+        return [(code, invites[code]) for code in codes]
+
+    def creator_quota_left(self, guild_id: str, creator_id: int) -> int:
+        """Custom invites a member may still create in a guild"""
+        return self.MAX_INVITES_PER_CREATOR - self.custom_invites.count_by('creator_id', guild_id, creator_id)
+
+    def format_expiry(self, data: Dict[str, Any]) -> str:
+        """Time left before an invite expires"""
+        expires_at = self.invite_expiry(data)
+        if expires_at is None:
+            return "Never"
+        remaining = max(0, int(expires_at - time.time()))
+        return f"in {remaining//3600}h {(remaining%3600)//60}m"
 
     async def setup_invite_tracking(self):
-        """Setup invite tracking for all guilds"""
+        """Seed the invite use-count snapshot for all guilds concurrently
+
+        Concurrency is bounded so startup stays well under the global rate
+        limit; discord.py still queues requests per bucket and retries 429s.
+        """
         await self.bot.wait_until_ready()
-        for guild in self.bot.guilds:
+        guilds = list(self.bot.guilds)
+        self.warmup.update(guilds=len(guilds), warmed=0, failed=0,
+                           started_at=time.monotonic(), finished_at=None)
+        semaphore = asyncio.Semaphore(self.WARMUP_CONCURRENCY)
+
+        async def warm(guild):
+            async with semaphore:
+                await self.warm_guild(guild)
+
+        await asyncio.gather(*(warm(guild) for guild in guilds))
+        self.warmup['finished_at'] = time.monotonic()
+        print(f"Invite warmup finished: {self.warmup['warmed']}/{len(guilds)} guilds in "
+              f"{self.warmup['finished_at'] - self.warmup['started_at']:.1f}s ({self.warmup['failed']} failed)")
+
+    async def warm_guild(self, guild: discord.Guild):
+        """Take the first snapshot of a guild unless it is already ready"""
+        async with self.get_invite_lock(guild.id):
+            await self.ensure_ready(guild)
+
+    async def ensure_ready(self, guild: discord.Guild) -> bool:
+        """Snapshot a guild not warmed up yet; must hold the guild's invite lock
+
+        Returns False if the guild was not ready, i.e. joins already queued
+        cannot be attributed. Guilds whose fetch failed are only retried
+        after a backoff, so joins there cost no REST call in between.
+        """
+        if guild.id in self.ready_guilds:
+            return True
+        failure = self.failed_guilds.get(guild.id)
+        if failure is not None and time.monotonic() < failure[0]:
+            return False
+        try:
+            await self.snapshot_invites(guild)
+        except (discord.Forbidden, discord.HTTPException):
+            self.fetch_failed(guild)
+            return False
+        if self.failed_guilds.pop(guild.id, None) is not None:
+            self.warmup['failed'] -= 1
+        self.warmup['warmed'] += 1
+        self.ready_guilds.add(guild.id)
+        return False
+
+    def fetch_failed(self, guild: discord.Guild):
+        """Stop attributing joins in a guild until its retry time"""
+        failure = self.failed_guilds.get(guild.id)
+        if failure is None:
+            self.warmup['failed'] += 1
+            delay = self.FETCH_RETRY_DELAY
+        else:
+            delay = min(failure[1] * 2, self.FETCH_RETRY_MAX_DELAY)
+        self.failed_guilds[guild.id] = (time.monotonic() + delay, delay)
+        if guild.id in self.ready_guilds:
+            self.ready_guilds.discard(guild.id)
+            self.warmup['warmed'] -= 1
+        self.invite_uses.pop(guild.id, None)
+
+    def collect_warmup_metrics(self, bot):
+        """Invite warmup progress for the metrics exporter"""
+        warmup = self.warmup
+        yield MetricFamily('invite_warmup_guilds', 'gauge', 'Guilds to warm up at startup').add(warmup['guilds'])
+        yield MetricFamily('invite_warmup_warmed', 'gauge', 'Guilds with an invite snapshot').add(warmup['warmed'])
+        yield MetricFamily('invite_warmup_failed', 'gauge', 'Guilds whose invites could not be fetched') \
+            .add(warmup['failed'])
+        yield MetricFamily('invite_ready_guilds', 'gauge', 'Guilds ready for join attribution').add(len(self.ready_guilds))
+        if warmup['started_at'] is not None:
+            elapsed = (warmup['finished_at'] or time.monotonic()) - warmup['started_at']
+            yield MetricFamily('invite_warmup_duration_seconds', 'gauge', 'Time spent warming up invite snapshots',
+                               unit='seconds').add(elapsed)
+
+    def get_invite_lock(self, guild_id: int) -> asyncio.Lock:
+        """Per-guild lock serializing invite snapshot diffs"""
+        lock = self.invite_locks.get(guild_id)
+        if lock is None:
+            lock = self.invite_locks[guild_id] = asyncio.Lock()
+        return lock
+
+    async def snapshot_invites(self, guild: discord.Guild) -> Dict[str, Tuple[int, int]]:
+        """Fetch a guild's invites and store their use counts"""
+        invites = await guild.invites()
+        snapshot = {invite.code: (invite.uses or 0, invite.max_uses or 0) for invite in invites}
+        self.invite_uses[guild.id] = snapshot
+        return snapshot
+
+    async def invite_use_deltas(self, guild: discord.Guild) -> Optional[Dict[str, int]]:
+        """Diff current invite uses against the snapshot
+
+        Must be called with the guild's invite lock held. Returns code -> number
+        of new uses, or None if there was no snapshot to diff against.
+        """
+        if guild.id in self.failed_guilds:
+            return None
+        before = self.invite_uses.get(guild.id)
+        try:
+            after = await self.snapshot_invites(guild)
+        except (discord.Forbidden, discord.HTTPException):
+            # Manage Guild was taken away; back off instead of failing every join
+            self.fetch_failed(guild)
+            return None
+        if before is None:
+            return None
+
+        # Uses seen by the previous batch whose join events had not arrived yet
+        deltas = self.unclaimed_uses.pop(guild.id, {})
+        for code, (uses, _) in after.items():
+            previous = before.get(code, (0, 0))[0]
+            if uses > previous:
+                deltas[code] = deltas.get(code, 0) + uses - previous
+
+        # Invites that hit max_uses are deleted by Discord, possibly before the join is handled.
+        # Only one use short of the cap counts: anything else vanished for another reason
+        # (deleted by a moderator, revoked) and says nothing about who joined.
+        deleted = self.deleted_invites.get(guild.id, {})
+        for code, (uses, max_uses) in list(before.items()) + list(deleted.items()):
+            if code not in after and max_uses and uses + 1 >= max_uses:
+                deltas[code] = deltas.get(code, 0) + 1
+                deleted.pop(code, None)
+        return deltas
+
+    def attribute_joins(self, guild: discord.Guild, members: List[discord.Member],
+                        deltas: Optional[Dict[str, int]]) -> Tuple[Dict[int, str], str]:
+        """Map member ids to invite codes from a batch of use-count deltas
+
+        Returns (member_id -> code, how). Members are only credited when the
+        deltas leave no doubt: a single invite covering every join, or several
+        invites that all grant the same role. Otherwise the batch falls back to
+        "vanity" (no tracked invite moved) or "unknown". Uses beyond the joins
+        in this batch belong to join events still in flight and are carried
+        over to the next batch.
+        """
+        if deltas is None:
+            return {}, "unknown"
+        if not deltas:
+            return {}, "vanity" if guild.vanity_url_code else "unknown"
+
+        custom = self.custom_invites.guild(str(guild.id))
+        roles = {custom[code]['role_id'] if code in custom else None for code in deltas}
+        if sum(deltas.values()) < len(members) or (len(deltas) > 1 and (len(roles) > 1 or None in roles)):
+            return {}, "unknown"
+
+        # Hand out codes in order so each invite's remaining uses are charged correctly
+        codes = [code for code, count in deltas.items() for _ in range(count)]
+        attribution = {member.id: code for member, code in zip(members, codes)}
+        leftover: Dict[str, int] = {}
+        for code in codes[len(members):]:
+            leftover[code] = leftover.get(code, 0) + 1
+        if leftover:
+            self.unclaimed_uses[guild.id] = leftover
+        return attribution, "invite"
+
+    async def assign_invite_roles(self, guild: discord.Guild, members: List[discord.Member],
+                                  attribution: Dict[int, str]) -> int:
+        """Assign custom invite roles for a batch of joins
+
+        Remaining uses are reserved synchronously first so concurrent role adds
+        can never overspend an invite; the REST calls then run concurrently
+        under a small semaphore on top of discord.py's rate limiter.
+        """
+        guild_id = str(guild.id)
+        guild_invites = self.custom_invites.guild(guild_id)
+        assignments = []
+        exhausted = []
+        for member in members:
+            invite_code = attribution.get(member.id)
+            invite_data = guild_invites.get(invite_code) if invite_code else None
+            if not invite_data or invite_data.get('uses', 0) <= 0:
+                continue
+
+            role = guild.get_role(invite_data['role_id'])
+            if not role or role >= guild.me.top_role:
+                continue
+
+            invite_data['uses'] -= 1
+            if invite_data['uses'] <= 0:
+                exhausted.append(invite_code)
+            assignments.append((member, role, invite_code, invite_data))
+
+        if not assignments:
+            return 0
+
+        semaphore = asyncio.Semaphore(self.ROLE_ADD_CONCURRENCY)
+
+        async def add_role(member, role):
+            async with semaphore:
+                try:
+                    await member.add_roles(role, reason="Custom invite role")
+                    return True
+                except discord.Forbidden:
+                    print(f"Failed to assign role {role.name} to {member.name}")
+                except Exception as e:
+                    print(f"Error assigning role: {e}")
+                return False
+
+        results = await asyncio.gather(*(add_role(member, role) for member, role, _, _ in assignments))
+
+        # Give back uses reserved for role adds that failed
+        for ok, (_, _, invite_code, invite_data) in zip(results, assignments):
+            if not ok:
+                invite_data['uses'] += 1
+                if invite_data['uses'] > 0 and invite_code in exhausted:
+                    exhausted.remove(invite_code)
+
+        # Delete invites with no uses left
+        for invite_code in exhausted:
+            self.custom_invites.remove(guild_id, invite_code)
             try:
-                await guild.invites()
-            except:
+                await self.bot.delete_invite(invite_code)
+            except discord.HTTPException:
                 pass
+        self.save_invites()
 
-    @commands.Cog.listener()
-    async def on_member_join(self, member: discord.Member):
-        """Handle member join and assign role based on invite used"""
+        assigned = [item for ok, item in zip(results, assignments) if ok]
+        await self.log_role_assignments(guild, assigned)
+        return len(assigned)
+
+    async def log_role_assignments(self, guild: discord.Guild, assigned: list):
+        """Post one log embed per batch of invite role assignments"""
+        log_channel = guild.system_channel
+        if not assigned or not log_channel or not log_channel.permissions_for(guild.me).send_messages:
+            return
+
+        if len(assigned) == 1:
+            member, role, invite_code, invite_data = assigned[0]
+            embed = discord.Embed(
+                title="Role Assigned via Invite",
+                description=f"{member.mention} was assigned the {role.mention} role",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="Invite Code", value=invite_code, inline=True)
+            embed.add_field(name="Inviter", value=f"<@{invite_data['creator_id']}>", inline=True)
+        else:
+            embed = discord.Embed(
+                title="Roles Assigned via Invites",
+                description=f"{len(assigned)} members were assigned roles during a join burst",
+                color=discord.Color.green()
+            )
+            per_code: Dict[str, list] = {}
+            for member, role, invite_code, _ in assigned:
+                per_code.setdefault(invite_code, [role, 0])[1] += 1
+            for invite_code, (role, count) in list(per_code.items())[:25]:
+                embed.add_field(name=f"Code: `{invite_code}`", value=f"{role.mention} × {count}", inline=True)
+        await log_channel.send(embed=embed)
+
+    def record_join(self, guild_id: int):
+        """Remember when a join arrived for burst detection"""
+        now = time.monotonic()
+        recent = self.recent_joins.setdefault(guild_id, deque())
+        recent.append(now)
+        while now - recent[0] > self.JOIN_BATCH_WINDOW:
+            recent.popleft()
+
+    def is_join_burst(self, guild_id: int) -> bool:
+        """Whether enough joins arrived within the batch window to coalesce them"""
+        recent = self.recent_joins.get(guild_id)
+        if not recent:
+            return False
+        while recent and time.monotonic() - recent[0] > self.JOIN_BATCH_WINDOW:
+            recent.popleft()
+        return len(recent) >= self.JOIN_BURST_THRESHOLD
+
+    async def flush_joins(self, guild: discord.Guild):
+        """Attribute every queued join of a guild with a single invite fetch"""
         try:
-            guild = member.guild
-            invites_before = self.custom_invites.get(str(guild.id), {})
-            
-            # Get current invites
-            current_invites = await guild.invites()
-            
-            # Find which invite was used
-            for invite in current_invites:
-                invite_code = invite.code
-                if invite_code in invites_before:
-                    invite_data = invites_before[invite_code]
-                    
-                    # Check if invite has uses left
-                    if invite_data.get('uses', 0) > 0:
-                        role_id = invite_data['role_id']
-                        role = guild.get_role(role_id)
-                        
-                        if role and role < guild.me.top_role:
-                            try:
-                                await member.add_roles(role)
-                                
-                                # Decrease uses count
-                                invite_data['uses'] -= 1
-                                if invite_data['uses'] <= 0:
-                                    # Delete invite if no uses left
-                                    try:
-                                        invite_obj = discord.utils.get(current_invites, code=invite_code)
-                                        if invite_obj:
-                                            await invite_obj.delete()
-                                        del invites_before[invite_code]
-                                    except:
-                                        pass
-                                
-                                self.custom_invites[str(guild.id)] = invites_before
-                                self.save_invites()
-                                
-                                # Log the assignment
-                                log_channel = guild.system_channel
-                                if log_channel and log_channel.permissions_for(guild.me).send_messages:
-                                    embed = discord.Embed(
-                                        title="Role Assigned via Invite",
-                                        description=f"{member.mention} was assigned the {role.mention} role",
-                                        color=discord.Color.green()
-                                    )
-                                    embed.add_field(name="Invite Code", value=invite_code, inline=True)
-                                    embed.add_field(name="Inviter", value=f"<@{invite_data['creator_id']}>", inline=True)
-                                    await log_channel.send(embed=embed)
-                                
-                                break
-                                
-                            except discord.Forbidden:
-                                print(f"Failed to assign role {role.name} to {member.name}")
-                            except Exception as e:
-                                print(f"Error assigning role: {e}")
-                                
+            async with self.get_invite_lock(guild.id):
+                if self.is_join_burst(guild.id):
+                    # Burst: let more joins pile up so they share one REST call
+                    await asyncio.sleep(self.JOIN_BATCH_WINDOW)
+                members = self.pending_joins.pop(guild.id, [])
+                if not members:
+                    return
+                if not await self.ensure_ready(guild):
+                    # Not warmed up yet: the snapshot just taken lets later joins be attributed
+                    if guild.id not in self.failed_guilds:
+                        print(f"{len(members)} join(s) in {guild.name} before invite warmup, not attributed")
+                    return
+                deltas = await self.invite_use_deltas(guild)
+                attribution, how = self.attribute_joins(guild, members, deltas)
+                if how != "invite" and len(members) > 1:
+                    print(f"Join burst of {len(members)} in {guild.name} attributed as {how}")
+                await self.assign_invite_roles(guild, members, attribution)
         except Exception as e:
             print(f"Error in on_member_join: {e}")
+        finally:
+            self.join_flush_tasks.pop(guild.id, None)
+            if self.pending_joins.get(guild.id):
+                self.join_flush_tasks[guild.id] = asyncio.create_task(self.flush_joins(guild))
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        """Queue the join; joins arriving together are attributed as one batch"""
+        guild = member.guild
+        self.record_join(guild.id)
+        self.pending_joins.setdefault(guild.id, []).append(member)
+        if guild.id not in self.join_flush_tasks:
+            self.join_flush_tasks[guild.id] = asyncio.create_task(self.flush_joins(guild))
+
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild: discord.Guild):
+        """Warm up invites of a newly joined guild"""
+        self.warmup['guilds'] += 1
+        await self.warm_guild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        """Drop per-guild tracking state"""
+        # Joins still queued can no longer get roles; don't let a pending flush run
+        self.pending_joins.pop(guild.id, None)
+        task = self.join_flush_tasks.pop(guild.id, None)
+        if task is not None:
+            task.cancel()
+        self.invite_locks.pop(guild.id, None)
+        # Keep the warmup gauges in step with the guilds still tracked
+        self.warmup['guilds'] = max(0, self.warmup['guilds'] - 1)
+        if guild.id in self.ready_guilds:
+            self.ready_guilds.discard(guild.id)
+            self.warmup['warmed'] -= 1
+        if self.failed_guilds.pop(guild.id, None) is not None:
+            self.warmup['failed'] -= 1
+        self.invite_uses.pop(guild.id, None)
+        self.deleted_invites.pop(guild.id, None)
+        self.recent_joins.pop(guild.id, None)
+        self.unclaimed_uses.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_invite_create(self, invite: discord.Invite):
+        """Track new invites in the use-count snapshot"""
+        if invite.guild is None:
+            return
+        snapshot = self.invite_uses.get(invite.guild.id)
+        if snapshot is not None:
+            snapshot[invite.code] = (invite.uses or 0, invite.max_uses or 0)
 
     @commands.command(name='create-invite', help='Create a custom invite link for a specific role')
     @commands.has_permissions(manage_roles=True)
@@ -124,6 +557,10 @@ class InviteManager(commands.Cog):
                 await ctx.send("❌ You can't create invites for roles higher than yours!")
                 return
 
+            if self.creator_quota_left(str(ctx.guild.id), ctx.author.id) <= 0:
+                await ctx.send(f"❌ You already have {self.MAX_INVITES_PER_CREATOR} custom invites open! Delete one first.")
+                return
+
             # Create invite
             invite = await ctx.channel.create_invite(
                 max_uses=uses,
@@ -134,10 +571,7 @@ class InviteManager(commands.Cog):
 
             # Store invite data
             guild_id = str(ctx.guild.id)
-            if guild_id not in self.custom_invites:
-                self.custom_invites[guild_id] = {}
-
-            self.custom_invites[guild_id][invite.code] = {
+            record = {
                 'role_id': role.id,
                 'role_name': role.name,
                 'creator_id': ctx.author.id,
@@ -148,6 +582,8 @@ class InviteManager(commands.Cog):
                 'created_at': datetime.now().isoformat(),
                 'channel_id': ctx.channel.id
             }
+            self.custom_invites.add(guild_id, invite.code, record)
+            self.schedule_expiry(guild_id, invite.code, record)
 
             self.save_invites()
 
@@ -168,24 +604,28 @@ class InviteManager(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Error creating invite: {str(e)}")
 
-    @commands.command(name='list-invites', help='List all active custom invites')
+    @commands.command(name='list-invites', help='List active custom invites, optionally --role @role / --creator @member')
     @commands.has_permissions(manage_roles=True)
-    async def list_invites(self, ctx):
-        """List all active custom invites for this server"""
+    async def list_invites(self, ctx, *, flags: ListInvitesFlags):
+        """List all active custom invites for this server
+
+        Args:
+            --role: Only invites granting this role
+            --creator: Only invites created by this member
+        """
         try:
-            guild_id = str(ctx.guild.id)
-            if guild_id not in self.custom_invites or not self.custom_invites[guild_id]:
+            invites = self.select_invites(str(ctx.guild.id), flags.role, flags.creator)
+            if not invites:
                 await ctx.send("❌ No custom invites found for this server!")
                 return
 
-            invites = self.custom_invites[guild_id]
             embed = discord.Embed(
                 title=f"📋 Custom Invites for {ctx.guild.name}",
                 description=f"Found {len(invites)} active custom invite(s)",
                 color=discord.Color.blue()
             )
 
-            for code, data in invites.items():
+            for code, data in invites[:25]:  # Embed field limit
                 role = ctx.guild.get_role(data['role_id'])
                 role_mention = role.mention if role else f"Role ID: {data['role_id']}"
                 
@@ -194,7 +634,7 @@ class InviteManager(commands.Cog):
                     value=f"Role: {role_mention}\n"
                           f"Uses: {data['uses']}/{data['max_uses']}\n"
                           f"Creator: <@{data['creator_id']}>\n"
-                          f"Expires: {data['age']//3600}h {(data['age']%3600)//60}m",
+                          f"Expires: {self.format_expiry(data)}",
                     inline=False
                 )
 
@@ -213,21 +653,18 @@ class InviteManager(commands.Cog):
         """
         try:
             guild_id = str(ctx.guild.id)
-            if guild_id not in self.custom_invites or code not in self.custom_invites[guild_id]:
+            if (guild_id, code) not in self.custom_invites:
                 await ctx.send("❌ Invite code not found!")
                 return
 
-            # Delete the actual invite
+            # Delete the actual invite straight from the stored code
             try:
-                invites = await ctx.guild.invites()
-                invite_obj = discord.utils.get(invites, code=code)
-                if invite_obj:
-                    await invite_obj.delete()
-            except:
+                await self.bot.delete_invite(code)
+            except discord.NotFound:
                 pass  # Invite might already be deleted
 
             # Remove from custom invites
-            del self.custom_invites[guild_id][code]
+            self.custom_invites.remove(guild_id, code)
             self.save_invites()
 
             await ctx.send(f"✅ Invite `{code}` has been deleted!")
@@ -235,6 +672,21 @@ class InviteManager(commands.Cog):
         except Exception as e:
             await ctx.send(f"❌ Error deleting invite: {str(e)}")
 
+    @commands.command(name='invite-quota', help='Show how many custom invites a member has open')
+    @commands.has_permissions(manage_roles=True)
+    async def invite_quota(self, ctx, member: Optional[discord.Member] = None):
+        """Show a member's open custom invites against the per-creator limit
+
+        Args:
+            member: Member to check (default: yourself)
+        """
+        member = member or ctx.author
+        guild_id = str(ctx.guild.id)
+        used = self.custom_invites.count_by('creator_id', guild_id, member.id)
+        codes = ', '.join(f"`{code}`" for code in sorted(self.custom_invites.codes_by('creator_id', guild_id, member.id)))
+        await ctx.send(f"📊 {member.display_name} has {used}/{self.MAX_INVITES_PER_CREATOR} custom invites open"
+                       + (f": {codes}" if codes else ""))
+
     # Slash Commands
     @discord.app_commands.command(name="create-invite", description="Create a custom invite for a specific role")
     @discord.app_commands.describe(
@@ -256,6 +708,12 @@ class InviteManager(commands.Cog):
                 await interaction.response.send_message("❌ I can't assign that role!", ephemeral=True)
                 return
 
+            if self.creator_quota_left(str(interaction.guild.id), interaction.user.id) <= 0:
+                await interaction.response.send_message(
+                    f"❌ You already have {self.MAX_INVITES_PER_CREATOR} custom invites open!", ephemeral=True
+                )
+                return
+
             invite = await interaction.channel.create_invite(
                 max_uses=uses,
                 max_age=age_seconds,
@@ -264,10 +722,7 @@ class InviteManager(commands.Cog):
             )
 
             guild_id = str(interaction.guild.id)
-            if guild_id not in self.custom_invites:
-                self.custom_invites[guild_id] = {}
-
-            self.custom_invites[guild_id][invite.code] = {
+            record = {
                 'role_id': role.id,
                 'role_name': role.name,
                 'creator_id': interaction.user.id,
@@ -278,6 +733,8 @@ class InviteManager(commands.Cog):
                 'created_at': datetime.now().isoformat(),
                 'channel_id': interaction.channel.id
             }
+            self.custom_invites.add(guild_id, invite.code, record)
+            self.schedule_expiry(guild_id, invite.code, record)
 
             self.save_invites()
 
@@ -296,23 +753,27 @@ class InviteManager(commands.Cog):
             await interaction.response.send_message(f"❌ Error: {str(e)}", ephemeral=True)
 
     @discord.app_commands.command(name="list-invites", description="List all active custom invites")
+    @discord.app_commands.describe(
+        role="Only invites granting this role",
+        creator="Only invites created by this member"
+    )
     @discord.app_commands.checks.has_permissions(manage_roles=True)
-    async def list_invites_slash(self, interaction: discord.Interaction):
+    async def list_invites_slash(self, interaction: discord.Interaction, role: Optional[discord.Role] = None,
+                                 creator: Optional[discord.Member] = None):
         """List custom invites via slash command"""
         try:
-            guild_id = str(interaction.guild.id)
-            if guild_id not in self.custom_invites or not self.custom_invites[guild_id]:
+            invites = self.select_invites(str(interaction.guild.id), role, creator)
+            if not invites:
                 await interaction.response.send_message("❌ No custom invites found!", ephemeral=True)
                 return
 
-            invites = self.custom_invites[guild_id]
             embed = discord.Embed(
                 title=f"📋 Custom Invites",
                 description=f"Found {len(invites)} active invite(s)",
                 color=discord.Color.blue()
             )
 
-            for code, data in list(invites.items())[:10]:  # Limit to 10 per embed
+            for code, data in invites[:10]:  # Limit to 10 per embed
                 role = interaction.guild.get_role(data['role_id'])
                 role_mention = role.mention if role else f"Role ID: {data['role_id']}"
                 
@@ -330,10 +791,17 @@ class InviteManager(commands.Cog):
     @commands.Cog.listener()
     async def on_invite_delete(self, invite):
         """Clean up when invites are deleted"""
-        guild_id = str(invite.guild.id)
-        if guild_id in self.custom_invites and invite.code in self.custom_invites[guild_id]:
-            del self.custom_invites[guild_id][invite.code]
-            self.save_invites()
+        # Keep the last known uses briefly: an invite deleted for hitting max_uses
+        # may still have to be matched against the join that used it up
+        snapshot = self.invite_uses.get(invite.guild.id, {})
+        if invite.code in snapshot:
+            self.deleted_invites.setdefault(invite.guild.id, {})[invite.code] = snapshot.pop(invite.code)
+        await asyncio.sleep(self.INVITE_DELETE_GRACE)
+
+        async with self.get_invite_lock(invite.guild.id):
+            self.deleted_invites.get(invite.guild.id, {}).pop(invite.code, None)
+            if self.custom_invites.remove(str(invite.guild.id), invite.code) is not None:
+                self.save_invites()
 
 async def setup(bot):
     await bot.add_cog(InviteManager(bot))
@@ -0,0 +1,80 @@
+"""
+Custom invite registry for the InviteManager cog
+Stores invite records per guild with secondary indexes by role, creator and channel
+"""
+
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Set, Tuple
+
+# Record fields that get a secondary index
+INDEXED_FIELDS = ('role_id', 'creator_id', 'channel_id')
+
+
+class InviteRegistry:
+    """guild_id -> code -> record, plus (guild_id, field value) -> codes indexes
+
+    Guild ids are strings, matching the JSON file. Indexed fields never change
+    after an invite is created; other fields (uses) may be edited in place.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None):
+        self.invites: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.indexes: Dict[str, Dict[Tuple[str, int], Set[str]]] = {field: {} for field in INDEXED_FIELDS}
+        for guild_id, invites in (data or {}).items():
+            for code, record in invites.items():
+                self.add(str(guild_id), code, record)
+
+    def __len__(self) -> int:
+        return sum(len(invites) for invites in self.invites.values())
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        guild_id, code = key
+        return code in self.invites.get(guild_id, {})
+
+    def add(self, guild_id: str, code: str, record: Dict[str, Any]):
+        """Store a record, replacing any previous one with the same code"""
+        self.remove(guild_id, code)
+        self.invites.setdefault(guild_id, {})[code] = record
+        for field, index in self.indexes.items():
+            if record.get(field) is not None:
+                index.setdefault((guild_id, record[field]), set()).add(code)
+
+    def remove(self, guild_id: str, code: str) -> Optional[Dict[str, Any]]:
+        """Drop a record and its index entries; returns it if it existed"""
+        invites = self.invites.get(guild_id)
+        if not invites or code not in invites:
+            return None
+        record = invites.pop(code)
+        if not invites:
+            del self.invites[guild_id]
+        for field, index in self.indexes.items():
+            key = (guild_id, record.get(field))
+            codes = index.get(key)
+            if codes is not None:
+                codes.discard(code)
+                if not codes:
+                    del index[key]
+        return record
+
+    def get(self, guild_id: str, code: str) -> Optional[Dict[str, Any]]:
+        """Record for a code, None if unknown"""
+        return self.invites.get(guild_id, {}).get(code)
+
+    def guild(self, guild_id: str) -> Dict[str, Dict[str, Any]]:
+        """All records of a guild; treat as read-only"""
+        return self.invites.get(guild_id, {})
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Dict[str, Any]]]]:
+        """(guild_id, records) pairs"""
+        return iter(self.invites.items())
+
+    def codes_by(self, field: str, guild_id: str, value: int) -> FrozenSet[str]:
+        """Codes of a guild whose indexed ``field`` equals ``value``, as a copy safe to iterate"""
+        return frozenset(self.indexes[field].get((guild_id, value), ()))
+
+    def count_by(self, field: str, guild_id: str, value: int) -> int:
+        """Number of records of a guild whose indexed ``field`` equals ``value``"""
+        return len(self.indexes[field].get((guild_id, value), ()))
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Nested dict in the invites.json format"""
+        return self.invites
@@ -0,0 +1,138 @@
+"""
+Memory diagnostics for hunting leaks in long-running instances
+Wraps tracemalloc (start/snapshot/diff) and reports the size of the bot's in-memory structures
+"""
+
+import asyncio
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from cog.performance_optimizations import global_cache
+
+# Cap on objects visited per structure so sizing stays cheap on huge dicts
+MAX_SIZED_OBJECTS = 200000
+
+
+def approx_size(obj: Any, limit: int = MAX_SIZED_OBJECTS) -> int:
+    """Approximate deep size in bytes of containers of plain data"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack and len(seen) < limit:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return total
+
+
+# Extra structures registered by the bot: name -> getter returning the object
+_structures: Dict[str, Callable[[], Any]] = {}
+
+
+def register_structure(name: str, getter: Callable[[], Any]):
+    """Register an in-memory structure to be sized by the diagnostics"""
+    _structures[name] = getter
+
+
+def tracked_structures(bot) -> Dict[str, Any]:
+    """All sized structures by name"""
+    structures = {'global_cache': global_cache.cache}
+
+    music = bot.get_cog('MusicCog')
+    if music is not None:
+        structures['music.queue'] = music.queue
+
+    tempvoice = bot.get_cog('TempVoice')
+    if tempvoice is not None:
+        structures['tempvoice.temp_channels'] = tempvoice.temp_channels
+
+    for name, getter in _structures.items():
+        structures[name] = getter()
+    return structures
+
+
+def structure_entries(bot) -> Dict[str, int]:
+    """Entry counts only, cheap enough for every metrics scrape"""
+    return {name: len(obj) for name, obj in tracked_structures(bot).items()}
+
+
+def structure_sizes(bot) -> List[Dict[str, Any]]:
+    """Entries and approximate bytes for each tracked structure"""
+    return [
+        {'name': name, 'entries': len(obj), 'bytes': approx_size(obj)}
+        for name, obj in tracked_structures(bot).items()
+    ]
+
+
+class MemoryTracker:
+    """tracemalloc session with a baseline and a latest snapshot"""
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self.baseline: Optional[tracemalloc.Snapshot] = None
+        self.latest: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        """Start tracing allocations"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.baseline = None
+        self.latest = None
+
+    def stop(self):
+        """Stop tracing and drop snapshots"""
+        tracemalloc.stop()
+        self.baseline = None
+        self.latest = None
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    async def snapshot(self, limit: int = 10) -> List[str]:
+        """Take a snapshot and report the top allocation sites
+
+        The first snapshot after start() becomes the baseline for diff().
+        """
+        if not self.tracing:
+            raise RuntimeError("tracemalloc is not running, start it first")
+        snapshot = await asyncio.to_thread(self._take)
+        if self.baseline is None:
+            self.baseline = snapshot
+        self.latest = snapshot
+        stats = await asyncio.to_thread(snapshot.statistics, 'lineno')
+        return [str(stat) for stat in stats[:limit]]
+
+    async def diff(self, limit: int = 10) -> List[str]:
+        """Take a snapshot and report growth since the baseline"""
+        if not self.tracing:
+            raise RuntimeError("tracemalloc is not running, start it first")
+        if self.baseline is None:
+            raise RuntimeError("No baseline snapshot yet, take one first")
+        self.latest = await asyncio.to_thread(self._take)
+        stats = await asyncio.to_thread(self.latest.compare_to, self.baseline, 'lineno')
+        return [str(stat) for stat in stats[:limit]]
+
+    def traced_memory(self) -> Dict[str, int]:
+        """Current and peak traced bytes"""
+        current, peak = tracemalloc.get_traced_memory()
+        return {'current': current, 'peak': peak}
+
+
+# Global memory tracker
+memory_tracker = MemoryTracker()
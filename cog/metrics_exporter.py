@@ -0,0 +1,313 @@
+"""
+Prometheus/OpenMetrics exporter for the Discord bot
+Serves a /metrics endpoint from the bot process so a local Prometheus can scrape it
+"""
+
+import os
+import hmac
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from aiohttp import web
+
+from cog.performance_optimizations import (
+    CommandLatency,
+    global_cache,
+    loop_lag_monitor,
+    perf_monitor,
+)
+
+logger = logging.getLogger('performance')
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+METRIC_PREFIX = 'discord_bot'
+
+
+def _escape(value) -> str:
+    """Escape a label value"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    """Format a sample value"""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class MetricFamily:
+    """A single OpenMetrics metric family and its samples"""
+
+    def __init__(self, name: str, metric_type: str, help_text: str, unit: str = ''):
+        self.name = f"{METRIC_PREFIX}_{name}"
+        self.type = metric_type
+        self.help = help_text
+        self.unit = unit
+        self.samples: List[Tuple[str, Dict[str, str], float]] = []
+
+    def add(self, value, labels: Optional[Dict[str, str]] = None, suffix: str = ''):
+        """Add a sample; counters get the mandatory _total suffix"""
+        if self.type == 'counter' and not suffix:
+            suffix = '_total'
+        self.samples.append((suffix, labels or {}, value))
+        return self
+
+    def render(self) -> List[str]:
+        """Render the family in OpenMetrics text format"""
+        lines = [f"# TYPE {self.name} {self.type}"]
+        if self.unit:
+            lines.append(f"# UNIT {self.name} {self.unit}")
+        lines.append(f"# HELP {self.name} {self.help}")
+        for suffix, labels, value in self.samples:
+            if labels:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{self.name}{suffix}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{self.name}{suffix} {_format_value(value)}")
+        return lines
+
+
+# Extra collectors registered by cogs: callable(bot) -> iterable of MetricFamily
+_collectors: List[Callable[..., Iterable[MetricFamily]]] = []
+
+
+def register_collector(collector: Callable[..., Iterable[MetricFamily]]):
+    """Register an extra metrics collector"""
+    if collector not in _collectors:
+        _collectors.append(collector)
+
+
+def unregister_collector(collector: Callable[..., Iterable[MetricFamily]]):
+    """Remove a previously registered collector"""
+    if collector in _collectors:
+        _collectors.remove(collector)
+
+
+def collect_command_metrics() -> Iterable[MetricFamily]:
+    """Command latency histograms"""
+    family = MetricFamily('command_duration_seconds', 'histogram', 'Command execution time', unit='seconds')
+    for name, stats in perf_monitor.command_times.items():
+        cumulative = 0
+        for bound, count in zip(CommandLatency.EXPORT_BUCKETS, stats.export_counts):
+            cumulative += count
+            family.add(cumulative, {'command': name, 'le': _format_value(bound)}, '_bucket')
+        family.add(stats.count, {'command': name, 'le': '+Inf'}, '_bucket')
+        family.add(stats.count, {'command': name}, '_count')
+        family.add(stats.total, {'command': name}, '_sum')
+    yield family
+
+
+def collect_cache_metrics() -> Iterable[MetricFamily]:
+    """AsyncCache hit/miss/eviction counters"""
+    labels = {'cache': 'global'}
+    yield MetricFamily('cache_hits', 'counter', 'Cache hits').add(global_cache.hits, labels)
+    yield MetricFamily('cache_misses', 'counter', 'Cache misses').add(global_cache.misses, labels)
+    yield MetricFamily('cache_evictions', 'counter', 'Expired cache entries dropped').add(global_cache.evictions, labels)
+    yield MetricFamily('cache_entries', 'gauge', 'Entries currently cached').add(len(global_cache.cache), labels)
+
+
+def collect_loop_metrics(bot) -> Iterable[MetricFamily]:
+    """Event loop lag and gateway latency"""
+    lag = loop_lag_monitor.histogram.summary(60)
+    yield MetricFamily('event_loop_lag_seconds', 'gauge', 'Last measured event loop lag', unit='seconds') \
+        .add(loop_lag_monitor.last_lag)
+    yield MetricFamily('event_loop_lag_p99_seconds', 'gauge', 'p99 event loop lag over the last minute', unit='seconds') \
+        .add(lag['p99'])
+
+    latency = bot.latency
+    if latency == latency and latency != float('inf'):  # NaN/inf before the first heartbeat
+        yield MetricFamily('gateway_latency_seconds', 'gauge', 'Gateway heartbeat latency', unit='seconds') \
+            .add(latency)
+    yield MetricFamily('guilds', 'gauge', 'Guilds the bot is in').add(len(bot.guilds))
+
+
+def collect_music_metrics(bot) -> Iterable[MetricFamily]:
+    """Per-guild music players and queue lengths"""
+    players = MetricFamily('music_players_active', 'gauge', 'Connected voice clients per guild')
+    for voice_client in bot.voice_clients:
+        guild = getattr(voice_client, 'guild', None)
+        if guild is not None:
+            players.add(1, {'guild_id': guild.id})
+    yield players
+
+    queues = MetricFamily('music_queue_length', 'gauge', 'Songs waiting per guild')
+    music = bot.get_cog('MusicCog')
+    if music is not None:
+        for guild_id, songs in music.queue.items():
+            queues.add(len(songs), {'guild_id': guild_id})
+    yield queues
+
+
+def collect_tempvoice_metrics(bot) -> Iterable[MetricFamily]:
+    """Temporary voice channel counts per guild"""
+    family = MetricFamily('tempvoice_channels', 'gauge', 'Active temporary voice channels per guild')
+    tempvoice = bot.get_cog('TempVoice')
+    if tempvoice is not None:
+        counts: Dict[int, int] = {}
+        for channel_id in tempvoice.temp_channels:
+            channel = bot.get_channel(channel_id)
+            guild_id = channel.guild.id if channel else 0
+            counts[guild_id] = counts.get(guild_id, 0) + 1
+        for guild_id, count in counts.items():
+            family.add(count, {'guild_id': guild_id})
+    yield family
+
+
+def collect_storage_metrics() -> Iterable[MetricFamily]:
+    """JSON/DB write counts and durations"""
+    family = MetricFamily('storage_write_seconds', 'summary', 'Time spent writing persistent stores', unit='seconds')
+    for store, (count, total) in perf_monitor.write_stats.items():
+        family.add(count, {'store': store}, '_count')
+        family.add(total, {'store': store}, '_sum')
+    yield family
+
+
+def collect_structure_metrics(bot) -> Iterable[MetricFamily]:
+    """Entry counts of the bot's unbounded in-memory structures"""
+    from cog.memory_diagnostics import structure_entries
+
+    family = MetricFamily('structure_entries', 'gauge', 'Entries in tracked in-memory structures')
+    for name, entries in structure_entries(bot).items():
+        family.add(entries, {'structure': name})
+    yield family
+
+
+def render_metrics(bot) -> str:
+    """Collect every metric family and render the exposition text"""
+    families: List[MetricFamily] = []
+    families.extend(collect_command_metrics())
+    families.extend(collect_cache_metrics())
+    families.extend(collect_loop_metrics(bot))
+    families.extend(collect_music_metrics(bot))
+    families.extend(collect_tempvoice_metrics(bot))
+    families.extend(collect_storage_metrics())
+    families.extend(collect_structure_metrics(bot))
+    for collector in _collectors:
+        try:
+            families.extend(collector(bot))
+        except Exception as e:
+            logger.error("Metrics collector %s failed: %s", collector.__name__, e)
+
+    lines = []
+    for family in families:
+        lines.extend(family.render())
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """Small aiohttp server living on the bot's event loop"""
+
+    def __init__(self, bot, host: str, port: int):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self.handle_metrics)
+        self.app.router.add_get('/debug/profile', self.handle_profile)
+        self.app.router.add_get('/debug/memory', self.handle_memory)
+        self.runner: Optional[web.AppRunner] = None
+        # Owner-only diagnostics are disabled unless a token is configured
+        self.diagnostics_token = os.getenv('DIAGNOSTICS_TOKEN', '')
+
+    def is_authorized(self, request: web.Request) -> bool:
+        """Check the bearer token for /debug endpoints"""
+        if not self.diagnostics_token:
+            return False
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        return hmac.compare_digest(supplied, self.diagnostics_token)
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Serve the current metrics"""
+        body = render_metrics(self.bot)
+        return web.Response(body=body.encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+    async def handle_profile(self, request: web.Request) -> web.Response:
+        """Run a sampling profile and return collapsed stacks"""
+        from cog.sampling_profiler import ProfilerBusy, profile
+
+        if not self.is_authorized(request):
+            return web.json_response({"error": "Forbidden"}, status=403)
+        try:
+            seconds = float(request.query.get('seconds', '10'))
+        except ValueError:
+            return web.json_response({"error": "seconds must be a number"}, status=400)
+
+        try:
+            sampler = await profile(seconds)
+        except ProfilerBusy as e:
+            return web.json_response({"error": str(e)}, status=409)
+
+        filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+        return web.Response(
+            text=sampler.collapsed(),
+            content_type='text/plain',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+    async def handle_memory(self, request: web.Request) -> web.Response:
+        """tracemalloc control and structure sizes, mirroring !memory"""
+        from cog.memory_diagnostics import memory_tracker, structure_sizes
+
+        if not self.is_authorized(request):
+            return web.json_response({"error": "Forbidden"}, status=403)
+
+        action = request.query.get('action', 'sizes').lower()
+        result = {"action": action, "tracing": memory_tracker.tracing}
+        try:
+            if action == 'start':
+                memory_tracker.start()
+            elif action == 'stop':
+                memory_tracker.stop()
+            elif action == 'snapshot':
+                result["top"] = await memory_tracker.snapshot()
+            elif action == 'diff':
+                result["top"] = await memory_tracker.diff()
+            elif action != 'sizes':
+                return web.json_response({"error": "Unknown action"}, status=400)
+        except RuntimeError as e:
+            return web.json_response({"error": str(e)}, status=409)
+
+        if memory_tracker.tracing:
+            result["traced"] = memory_tracker.traced_memory()
+        result["tracing"] = memory_tracker.tracing
+        result["structures"] = structure_sizes(self.bot)
+        return web.json_response(result)
+
+    async def start(self):
+        """Start listening"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        logger.info("Metrics exporter listening on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self):
+        """Stop listening"""
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+# Global metrics server, created on startup
+metrics_server: Optional[MetricsServer] = None
+
+
+async def start_metrics_server(bot) -> Optional[MetricsServer]:
+    """Start the exporter unless METRICS_PORT is 0"""
+    global metrics_server
+    port = int(os.getenv('METRICS_PORT', '9108'))
+    if not port or metrics_server is not None:
+        return metrics_server
+
+    host = os.getenv('METRICS_HOST', '127.0.0.1')
+    server = MetricsServer(bot, host, port)
+    try:
+        await server.start()
+    except OSError as e:
+        logger.error("Failed to start metrics exporter on %s:%s: %s", host, port, e)
+        return None
+    metrics_server = server
+    return metrics_server
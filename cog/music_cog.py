@@ -5,11 +5,16 @@ import asyncio
 import urllib.parse
 import re
 
+from cog.dashboard_operations import register_operation
+from cog.dashboard_state import MusicSnapshot, snapshot_music
+
 class MusicCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.queue = {}
         self.voice_clients = {}
+        # guild_id -> song currently playing, for the dashboard
+        self.current_songs = {}
         
         # yt-dlp options for better audio quality
         self.ytdl_format_options = {
@@ -33,6 +38,38 @@ class MusicCog(commands.Cog):
         
         self.ytdl = yt_dlp.YoutubeDL(self.ytdl_format_options)
 
+    def music_changed(self, guild_id):
+        """Tell the dashboard this guild's player or queue changed"""
+        self.bot.dispatch('music_update', guild_id)
+
+    def control(self, guild_id, action):
+        """Apply a dashboard player action; returns an error message or None"""
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        
+        if action == 'skip':
+            if voice_client is None or not voice_client.is_playing():
+                return "No song is currently playing!"
+            voice_client.stop()
+        elif action == 'pause':
+            if voice_client is None or not voice_client.is_playing():
+                return "No song is currently playing!"
+            voice_client.pause()
+        elif action == 'resume':
+            if voice_client is None or not voice_client.is_paused():
+                return "No song is paused!"
+            voice_client.resume()
+        elif action == 'stop':
+            self.queue[guild_id] = []
+            if voice_client is not None:
+                voice_client.stop()
+            self.current_songs.pop(guild_id, None)
+        else:
+            return f"Unknown music action: {action}"
+        
+        self.music_changed(guild_id)
+        return None
+
     async def get_video_info(self, url):
         """Extract video information from URL"""
         try:
@@ -75,6 +112,8 @@ class MusicCog(commands.Cog):
             return await ctx.send("❌ I'm not in a voice channel!")
         
         await ctx.voice_client.disconnect()
+        if self.current_songs.pop(ctx.guild.id, None) is not None:
+            self.music_changed(ctx.guild.id)
         await ctx.send("👋 Left the voice channel!")
 
     @commands.command(name='play', help='Play a song from YouTube')
@@ -113,10 +152,13 @@ class MusicCog(commands.Cog):
             'title': video_info.get('title', 'Unknown'),
             'url': video_info.get('webpage_url', ''),
             'duration': video_info.get('duration', 0),
-            'requester': ctx.author.display_name
+            'requester': ctx.author.display_name,
+            'artist': video_info.get('uploader'),
+            'thumbnail': video_info.get('thumbnail')
         }
         
         self.queue[guild_id].append(song)
+        self.music_changed(guild_id)
         
         if ctx.voice_client.is_playing():
             await ctx.send(f"🎵 Added to queue: **{song['title']}**")
@@ -128,6 +170,8 @@ class MusicCog(commands.Cog):
         guild_id = ctx.guild.id
         
         if guild_id not in self.queue or not self.queue[guild_id]:
+            if self.current_songs.pop(guild_id, None) is not None:
+                self.music_changed(guild_id)
             return
         
         song = self.queue[guild_id].pop(0)
@@ -149,6 +193,8 @@ class MusicCog(commands.Cog):
             
             source = discord.FFmpegPCMAudio(url2, **self.ffmpeg_options)
             ctx.voice_client.play(source, after=after_playing)
+            self.current_songs[guild_id] = song
+            self.music_changed(guild_id)
             
             embed = discord.Embed(
                 title="🎵 Now Playing",
@@ -168,6 +214,7 @@ class MusicCog(commands.Cog):
             return await ctx.send("❌ No song is currently playing!")
         
         ctx.voice_client.stop()
+        self.music_changed(ctx.guild.id)
         await ctx.send("⏭️ Skipped the current song!")
 
     @commands.command(name='queue', help='Show the current queue')
@@ -196,6 +243,7 @@ class MusicCog(commands.Cog):
         
         if guild_id in self.queue:
             self.queue[guild_id] = []
+            self.music_changed(guild_id)
         
         await ctx.send("🗑️ Music queue cleared!")
 
@@ -206,6 +254,7 @@ class MusicCog(commands.Cog):
             return await ctx.send("❌ No song is currently playing!")
         
         ctx.voice_client.pause()
+        self.music_changed(ctx.guild.id)
         await ctx.send("⏸️ Paused the music!")
 
     @commands.command(name='resume', help='Resume the paused song')
@@ -215,6 +264,7 @@ class MusicCog(commands.Cog):
             return await ctx.send("❌ No song is paused!")
         
         ctx.voice_client.resume()
+        self.music_changed(ctx.guild.id)
         await ctx.send("▶️ Resumed the music!")
 
     @commands.command(name='stop', help='Stop the music and clear queue')
@@ -227,6 +277,8 @@ class MusicCog(commands.Cog):
         
         if ctx.voice_client is not None:
             ctx.voice_client.stop()
+        self.current_songs.pop(guild_id, None)
+        self.music_changed(guild_id)
         
         await ctx.send("⏹️ Stopped the music and cleared the queue!")
 
@@ -238,5 +290,19 @@ class MusicCog(commands.Cog):
         
         await ctx.send("🎵 A song is currently playing...")
 
+async def music_action(bot, guild_id, action):
+    """Dashboard operation: run a player action and acknowledge with the resulting state"""
+    music = bot.get_cog('MusicCog')
+    if music is None:
+        return {"ok": False, "error": "Music is not loaded"}
+    
+    error = music.control(guild_id, action)
+    if error:
+        return {"ok": False, "error": error}
+    # The published snapshot lags by the debounce delay, so report the live state
+    player = snapshot_music(bot, guild_id) or MusicSnapshot(guild_id)
+    return {"ok": True, "action": action, "player": player.to_dict()}
+
 async def setup(bot):
+    register_operation('music_action', music_action)
     await bot.add_cog(MusicCog(bot))
@@ -4,38 +4,236 @@ Focuses on improving command response time and reducing latency
 """
 
 import asyncio
+import atexit
+import bisect
+import contextlib
 import functools
+import io
+import itertools
+import math
+import os
+import queue
 import time
+from datetime import datetime
 from typing import Any, Callable, Optional, Dict
 import logging
+import logging.handlers
 from discord.ext import commands
 import discord
 
-# Configure logging for performance monitoring
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('performance')
 
+# Only every Nth successful timing is logged; failures are always logged
+TIMING_LOG_SAMPLE_EVERY = max(1, int(os.getenv('TIMING_LOG_SAMPLE_EVERY', '100')))
+_timing_log_counter = itertools.count()
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves %-formatting to the listener thread"""
+
+    def prepare(self, record):
+        # The stock prepare() formats the message in the calling thread
+        return record
+
+def setup_logging(level: Optional[str] = None) -> logging.handlers.QueueListener:
+    """Configure non-blocking logging for the whole process, once
+
+    Records are pushed onto an in-memory queue by the calling thread and
+    formatted/written by a QueueListener thread, so the event loop never
+    blocks on a handler write.
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return _log_listener
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter(
+        '%(asctime)s %(levelname)-8s %(name)s: %(message)s'
+    ))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [_LazyQueueHandler(log_queue)]
+    root.setLevel(level)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _log_listener.start()
+    # The listener thread is a daemon; drain what is still queued (shutdown and crash lines) at exit
+    atexit.register(shutdown_logging)
+    return _log_listener
+
+def shutdown_logging():
+    """Flush and stop the logging listener thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def _log_timing(name: str, duration: float):
+    """Log a sampled timing line, formatted lazily by the listener"""
+    if next(_timing_log_counter) % TIMING_LOG_SAMPLE_EVERY == 0 and logger.isEnabledFor(logging.INFO):
+        logger.info("%s took %.3fs (1 in %d sampled)", name, duration, TIMING_LOG_SAMPLE_EVERY)
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram over a ring of fixed-width time slots
+
+    Recording is O(1) and memory is bounded by ``slot_count`` slots of at most
+    ``BUCKET_COUNT`` counters each, independent of how many samples arrive.
+    """
+
+    MIN_VALUE = 1e-5  # 10us, anything faster lands in bucket 0
+    GROWTH = 1.1  # percentiles report the bucket's geometric midpoint: <5% relative error
+    BUCKET_COUNT = 200  # covers up to ~30 minutes
+    _LOG_GROWTH = math.log(GROWTH)
+
+    def __init__(self, slot_seconds: int, slot_count: int):
+        self.slot_seconds = slot_seconds
+        self.slot_count = slot_count
+        # Each slot is [epoch, {bucket: count}, max_value]
+        self.slots = [[-1, {}, 0.0] for _ in range(slot_count)]
+
+    @classmethod
+    def bucket_for(cls, value: float) -> int:
+        """Map a duration in seconds to its bucket index"""
+        if value <= cls.MIN_VALUE:
+            return 0
+        index = int(math.log(value / cls.MIN_VALUE) / cls._LOG_GROWTH) + 1
+        return min(index, cls.BUCKET_COUNT - 1)
+
+    @classmethod
+    def bucket_value(cls, index: int) -> float:
+        """Value in seconds reported for a bucket: the geometric midpoint of its bounds"""
+        if index == 0:
+            return cls.MIN_VALUE
+        return cls.MIN_VALUE * cls.GROWTH ** (index - 0.5)
+
+    def record(self, value: float, now: Optional[float] = None):
+        """Record one sample"""
+        epoch = int((now if now is not None else time.monotonic()) // self.slot_seconds)
+        slot = self.slots[epoch % self.slot_count]
+        if slot[0] != epoch:
+            slot[0] = epoch
+            slot[1] = {}
+            slot[2] = 0.0
+        bucket = self.bucket_for(value)
+        slot[1][bucket] = slot[1].get(bucket, 0) + 1
+        if value > slot[2]:
+            slot[2] = value
+
+    def merged(self, window: float, now: Optional[float] = None):
+        """Merge the slots covering the last ``window`` seconds"""
+        current = int((now if now is not None else time.monotonic()) // self.slot_seconds)
+        oldest = current - max(1, math.ceil(window / self.slot_seconds)) + 1
+        counts = {}
+        max_value = 0.0
+        for epoch, slot_counts, slot_max in self.slots:
+            if oldest <= epoch <= current:
+                for bucket, count in slot_counts.items():
+                    counts[bucket] = counts.get(bucket, 0) + count
+                max_value = max(max_value, slot_max)
+        return counts, max_value
+
+    def summary(self, window: float, quantiles=(0.5, 0.95, 0.99), now: Optional[float] = None) -> Dict[str, float]:
+        """Percentiles, max and count for the last ``window`` seconds"""
+        counts, max_value = self.merged(window, now)
+        total = sum(counts.values())
+        result = {'count': total, 'max': max_value}
+        if not total:
+            for q in quantiles:
+                result[f"p{int(q * 100)}"] = 0.0
+            return result
+
+        ordered = sorted(counts.items())
+        for q in quantiles:
+            rank = max(1, math.ceil(q * total))
+            seen = 0
+            for bucket, count in ordered:
+                seen += count
+                if seen >= rank:
+                    # Never report more than the largest value actually seen
+                    result[f"p{int(q * 100)}"] = min(self.bucket_value(bucket), max_value)
+                    break
+        return result
+
+
+class CommandLatency:
+    """Streaming latency statistics for a single command"""
+
+    # Short slots keep the 1m window precise, long slots cover 15m and 1h
+    WINDOWS = {'1m': 60, '15m': 900, '1h': 3600}
+    # Fixed lifetime buckets for the Prometheus exporter
+    EXPORT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.short = LatencyHistogram(slot_seconds=5, slot_count=12)
+        self.long = LatencyHistogram(slot_seconds=60, slot_count=60)
+        self.count = 0
+        self.total = 0.0
+        self.export_counts = [0] * (len(self.EXPORT_BUCKETS) + 1)
+
+    def record(self, duration: float):
+        """Record one execution"""
+        now = time.monotonic()
+        self.short.record(duration, now)
+        self.long.record(duration, now)
+        self.count += 1
+        self.total += duration
+        self.export_counts[bisect.bisect_left(self.EXPORT_BUCKETS, duration)] += 1
+
+    def summary(self, window: str) -> Dict[str, float]:
+        """Percentiles for one of the named windows"""
+        seconds = self.WINDOWS[window]
+        histogram = self.short if seconds <= self.short.slot_seconds * self.short.slot_count else self.long
+        return histogram.summary(seconds)
+
+
 class PerformanceMonitor:
     """Monitor and log command execution times"""
     
     def __init__(self):
-        self.command_times = {}
+        self.command_times: Dict[str, CommandLatency] = {}
+        # store name -> [write count, total seconds]
+        self.write_stats: Dict[str, list] = {}
     
     def track_command(self, command_name: str, duration: float):
         """Track command execution time"""
-        if command_name not in self.command_times:
-            self.command_times[command_name] = []
-        self.command_times[command_name].append(duration)
-        
-        # Keep only last 100 measurements
-        if len(self.command_times[command_name]) > 100:
-            self.command_times[command_name] = self.command_times[command_name][-100:]
+        stats = self.command_times.get(command_name)
+        if stats is None:
+            stats = self.command_times[command_name] = CommandLatency()
+        stats.record(duration)
     
     def get_average_time(self, command_name: str) -> float:
-        """Get average execution time for a command"""
-        if command_name not in self.command_times or not self.command_times[command_name]:
+        """Get lifetime average execution time for a command"""
+        stats = self.command_times.get(command_name)
+        if not stats or not stats.count:
             return 0.0
-        return sum(self.command_times[command_name]) / len(self.command_times[command_name])
+        return stats.total / stats.count
+
+    def get_summary(self, command_name: str, window: str = '1h') -> Dict[str, float]:
+        """Get p50/p95/p99/max for a command over a window (1m, 15m or 1h)"""
+        stats = self.command_times.get(command_name)
+        if not stats:
+            return {'count': 0, 'max': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        return stats.summary(window)
+
+    def track_write(self, store: str, duration: float):
+        """Track a JSON/DB write to a named store"""
+        stats = self.write_stats.get(store)
+        if stats is None:
+            stats = self.write_stats[store] = [0, 0.0]
+        stats[0] += 1
+        stats[1] += duration
+
+    @contextlib.contextmanager
+    def timed_write(self, store: str):
+        """Context manager timing a write to a named store"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.track_write(store, time.perf_counter() - start_time)
 
 # Global performance monitor
 perf_monitor = PerformanceMonitor()
@@ -49,11 +247,11 @@ def performance_timer(func: Callable) -> Callable:
             result = await func(*args, **kwargs)
             duration = time.perf_counter() - start_time
             perf_monitor.track_command(func.__name__, duration)
-            logger.info(f"{func.__name__} took {duration:.3f}s")
+            _log_timing(func.__name__, duration)
             return result
         except Exception as e:
             duration = time.perf_counter() - start_time
-            logger.error(f"{func.__name__} failed after {duration:.3f}s: {e}")
+            logger.error("%s failed after %.3fs: %s", func.__name__, duration, e)
             raise
     
     @functools.wraps(func)
@@ -63,11 +261,11 @@ def performance_timer(func: Callable) -> Callable:
             result = func(*args, **kwargs)
             duration = time.perf_counter() - start_time
             perf_monitor.track_command(func.__name__, duration)
-            logger.info(f"{func.__name__} took {duration:.3f}s")
+            _log_timing(func.__name__, duration)
             return result
         except Exception as e:
             duration = time.perf_counter() - start_time
-            logger.error(f"{func.__name__} failed after {duration:.3f}s: {e}")
+            logger.error("%s failed after %.3fs: %s", func.__name__, duration, e)
             raise
     
     if asyncio.iscoroutinefunction(func):
@@ -132,17 +330,35 @@ class AsyncCache:
     def __init__(self, ttl: int = 300):
         self.cache = {}
         self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
     
     async def get(self, key: str, fetch_func: Callable[[], Any]) -> Any:
         """Get cached value or fetch new one"""
         if key in self.cache:
             value, timestamp = self.cache[key]
             if time.time() - timestamp < self.ttl:
+                self.hits += 1
                 return value
+            self.evictions += 1
         
+        self.misses += 1
         value = await fetch_func()
         self.cache[key] = (value, time.time())
         return value
+
+    def evict_expired(self) -> int:
+        """Drop entries older than the TTL"""
+        current_time = time.time()
+        expired_keys = [
+            key for key, (_, timestamp) in self.cache.items()
+            if current_time - timestamp > self.ttl
+        ]
+        for key in expired_keys:
+            del self.cache[key]
+        self.evictions += len(expired_keys)
+        return len(expired_keys)
     
     def invalidate(self, key: str):
         """Invalidate specific cache key"""
@@ -229,10 +445,32 @@ class ConnectionPool:
 # Global connection pool
 connection_pool = ConnectionPool()
 
+class LoopLagMonitor:
+    """Measure event loop lag as the overshoot of a periodic sleep"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.histogram = LatencyHistogram(slot_seconds=5, slot_count=12)
+
+    async def run(self, bot):
+        """Sample lag until the bot closes"""
+        while not bot.is_closed():
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.histogram.record(self.last_lag)
+
+# Global loop lag monitor
+loop_lag_monitor = LoopLagMonitor()
+
 # Performance monitoring commands
 class PerformanceCommands(commands.Cog):
     """Commands for monitoring bot performance"""
     
+    # Headroom under the attachment limit for the multipart body and embed
+    UPLOAD_OVERHEAD_BYTES = 64 * 1024
+    
     def __init__(self, bot):
         self.bot = bot
     
@@ -246,24 +484,128 @@ class PerformanceCommands(commands.Cog):
             timestamp=discord.utils.utcnow()
         )
         
-        # Show top 10 slowest commands
+        # Rank by 1h p99 so the embed surfaces tail latency, not averages
+        summaries = {
+            cmd: {window: stats.summary(window) for window in CommandLatency.WINDOWS}
+            for cmd, stats in perf_monitor.command_times.items()
+        }
         slow_commands = sorted(
-            perf_monitor.command_times.items(),
-            key=lambda x: sum(x[1]) / len(x[1]) if x[1] else 0,
+            ((cmd, windows) for cmd, windows in summaries.items() if windows['1h']['count']),
+            key=lambda x: x[1]['1h']['p99'],
             reverse=True
         )[:10]
         
-        for cmd, times in slow_commands:
-            if times:
-                avg_time = sum(times) / len(times)
-                embed.add_field(
-                    name=cmd,
-                    value=f"Avg: {avg_time:.3f}s\nCalls: {len(times)}",
-                    inline=True
-                )
+        for cmd, windows in slow_commands:
+            lines = []
+            for window, stats in windows.items():
+                if stats['count']:
+                    lines.append(
+                        f"**{window}** p50 {stats['p50']*1000:.0f} / p95 {stats['p95']*1000:.0f} / "
+                        f"p99 {stats['p99']*1000:.0f} / max {stats['max']*1000:.0f}ms ({stats['count']})"
+                    )
+            embed.add_field(name=cmd, value="\n".join(lines), inline=False)
+
+        if not slow_commands:
+            embed.description = "No commands recorded in the last hour"
         
         await ctx.send(embed=embed)
+
+    @commands.Cog.listener()
+    async def on_command(self, ctx):
+        """Remember when a prefix command started"""
+        ctx.perf_started_at = time.perf_counter()
+
+    @commands.Cog.listener()
+    async def on_command_completion(self, ctx):
+        """Record latency of every completed prefix command"""
+        started_at = getattr(ctx, 'perf_started_at', None)
+        if started_at is not None:
+            perf_monitor.track_command(ctx.command.qualified_name, time.perf_counter() - started_at)
     
+    @commands.command(name='profile', help='Sample CPU stacks for N seconds (max 60)')
+    @commands.is_owner()
+    async def profile(self, ctx, seconds: int = 10):
+        """Run the sampling profiler and upload collapsed stacks for flamegraphs"""
+        from cog.sampling_profiler import MAX_SECONDS, ProfilerBusy, profile
+
+        seconds = max(1, min(seconds, MAX_SECONDS))
+        await ctx.send(f"🔬 Profiling for {seconds}s...")
+        try:
+            sampler = await profile(seconds)
+        except ProfilerBusy:
+            await ctx.send("❌ A profiling session is already running!")
+            return
+
+        embed = discord.Embed(
+            title="🔬 Profile Complete",
+            description=f"{sampler.samples} samples, {len(sampler.stacks)} unique stacks",
+            color=0x00ff00,
+            timestamp=discord.utils.utcnow()
+        )
+        top = "\n".join(f"`{frame}` × {count}" for frame, count in sampler.top_frames())
+        if top:
+            embed.add_field(name="Hottest frames", value=top[:1024], inline=False)
+
+        # Deep stacks over 60s can exceed the upload limit; keep the hottest stacks that fit
+        limit = ctx.guild.filesize_limit if ctx.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+        collapsed = sampler.collapsed(max_bytes=limit - self.UPLOAD_OVERHEAD_BYTES)
+        if '[truncated]' in collapsed:
+            embed.set_footer(text="Rarest stacks are counted under [truncated]")
+
+        data = io.BytesIO(collapsed.encode('utf-8'))
+        filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+        await ctx.send(embed=embed, file=discord.File(data, filename=filename))
+
+    @commands.command(name='memory', help='Memory diagnostics: start, snapshot, diff, stop or sizes')
+    @commands.is_owner()
+    async def memory(self, ctx, action: str = 'sizes'):
+        """tracemalloc snapshots and in-memory structure sizes"""
+        from cog.memory_diagnostics import memory_tracker, structure_sizes
+
+        action = action.lower()
+        embed = discord.Embed(
+            title=f"🧠 Memory: {action}",
+            color=0x00ff00,
+            timestamp=discord.utils.utcnow()
+        )
+        try:
+            if action == 'start':
+                memory_tracker.start()
+                embed.description = "tracemalloc started. Take a `snapshot`, then `diff` later."
+            elif action == 'stop':
+                memory_tracker.stop()
+                embed.description = "tracemalloc stopped."
+            elif action in ('snapshot', 'diff'):
+                if action == 'snapshot':
+                    lines = await memory_tracker.snapshot()
+                else:
+                    lines = await memory_tracker.diff()
+                traced = memory_tracker.traced_memory()
+                embed.description = (
+                    f"Traced: {traced['current'] / 1024 / 1024:.1f} MiB "
+                    f"(peak {traced['peak'] / 1024 / 1024:.1f} MiB)"
+                )
+                embed.add_field(
+                    name="Top allocation sites",
+                    value="\n".join(f"`{line[:180]}`" for line in lines)[:1024] or "None",
+                    inline=False
+                )
+            elif action == 'sizes':
+                for item in structure_sizes(self.bot):
+                    embed.add_field(
+                        name=item['name'],
+                        value=f"{item['entries']} entries\n~{item['bytes'] / 1024:.1f} KiB",
+                        inline=True
+                    )
+            else:
+                await ctx.send("❌ Use `start`, `snapshot`, `diff`, `stop` or `sizes`")
+                return
+        except RuntimeError as e:
+            await ctx.send(f"❌ {e}")
+            return
+
+        await ctx.send(embed=embed)
+
     @commands.command(name='clearcache', help='Clear performance caches')
     @commands.is_owner()
     async def clear_cache(self, ctx):
@@ -305,16 +647,10 @@ async def performance_cleanup_task(bot):
             await connection_pool.cleanup_idle_connections()
             
             # Clear expired cache entries
-            current_time = time.time()
-            expired_keys = [
-                key for key, (_, timestamp) in global_cache.cache.items()
-                if current_time - timestamp > global_cache.ttl
-            ]
-            for key in expired_keys:
-                global_cache.invalidate(key)
+            global_cache.evict_expired()
                 
         except Exception as e:
-            logger.error(f"Error in cleanup task: {e}")
+            logger.error("Error in cleanup task: %s", e)
         
         await asyncio.sleep(60)  # Run every minute
 
@@ -325,5 +661,10 @@ async def setup_performance_optimizations(bot):
     
     # Start background cleanup task
     bot.loop.create_task(performance_cleanup_task(bot))
+    bot.loop.create_task(loop_lag_monitor.run(bot))
+
+    # Serve /metrics for Prometheus
+    from cog.metrics_exporter import start_metrics_server
+    await start_metrics_server(bot)
     
     logger.info("Performance optimizations loaded successfully")
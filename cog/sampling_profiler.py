@@ -0,0 +1,154 @@
+"""
+Low-overhead statistical CPU profiler for live diagnosis
+Samples the event-loop thread and executor threads and emits collapsed stacks for flamegraphs
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Hard limits so a profiling session can never hurt the bot for long
+MAX_SECONDS = 60
+DEFAULT_INTERVAL = 0.01  # 100 Hz
+MAX_DEPTH = 64
+MAX_UNIQUE_STACKS = 20000
+
+# Thread name prefixes of asyncio's default executor and plain ThreadPoolExecutors
+EXECUTOR_PREFIXES = ('asyncio_', 'ThreadPoolExecutor')
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profiling session is already running"""
+
+
+_session_lock = threading.Lock()
+
+
+def _frame_label(frame) -> str:
+    """Flamegraph label for a single frame"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Periodically sample the stacks of a set of threads"""
+
+    def __init__(self, loop_thread_id: int, interval: float = DEFAULT_INTERVAL):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.dropped = 0
+
+    def _target_threads(self, own_id: int) -> Dict[int, str]:
+        """Thread ids to sample mapped to their flamegraph root label"""
+        targets = {self.loop_thread_id: 'event-loop'}
+        for thread in threading.enumerate():
+            if thread.ident != own_id and thread.name.startswith(EXECUTOR_PREFIXES):
+                targets[thread.ident] = thread.name
+        return targets
+
+    def _sample_once(self, own_id: int):
+        """Record one stack per target thread"""
+        frames = sys._current_frames()
+        for thread_id, root in self._target_threads(own_id).items():
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+
+            labels = []
+            while frame is not None and len(labels) < MAX_DEPTH:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(root)
+            stack = ';'.join(reversed(labels))
+
+            if stack in self.stacks or len(self.stacks) < MAX_UNIQUE_STACKS:
+                self.stacks[stack] += 1
+            else:
+                self.dropped += 1
+        self.samples += 1
+
+    def run(self, seconds: float):
+        """Sample for ``seconds``; blocks the calling thread"""
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        next_tick = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            self._sample_once(own_id)
+            next_tick += self.interval
+            # Skip missed ticks instead of bursting to catch up
+            if next_tick < now:
+                next_tick = now + self.interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def collapsed(self, max_bytes: Optional[int] = None) -> str:
+        """Stacks in Brendan Gregg's collapsed format
+
+        With ``max_bytes`` only the hottest stacks that fit are kept; samples of
+        the rest are counted under ``[truncated]`` like stacks dropped while sampling.
+        """
+        lines = []
+        size = 0
+        truncated = self.dropped
+        budget = None if max_bytes is None else max_bytes - 64  # room for the [truncated] line
+        full = False
+        for stack, count in self.stacks.most_common():
+            line = f"{stack} {count}"
+            line_size = len(line.encode('utf-8')) + 1
+            # Stop at the first stack that doesn't fit so the kept ones are exactly the top N
+            full = full or (budget is not None and size + line_size > budget)
+            if full:
+                truncated += count
+                continue
+            lines.append(line)
+            size += line_size
+        if truncated:
+            lines.append(f"[truncated] {truncated}")
+        return '\n'.join(lines) + '\n'
+
+    def top_frames(self, limit: int = 5):
+        """Leaf frames with the most samples"""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(limit)
+
+
+async def profile(seconds: float, interval: float = DEFAULT_INTERVAL,
+                  loop_thread_id: Optional[int] = None) -> StackSampler:
+    """Profile for ``seconds`` from inside the bot's event loop
+
+    Only one session may run at a time; raises ProfilerBusy otherwise.
+    The sampler gets its own thread so it does not occupy an executor slot.
+    """
+    seconds = max(1.0, min(float(seconds), MAX_SECONDS))
+    if not _session_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profiling session is already running")
+
+    try:
+        loop = asyncio.get_running_loop()
+        sampler = StackSampler(loop_thread_id or threading.get_ident(), interval)
+        done = loop.create_future()
+
+        def worker():
+            try:
+                sampler.run(seconds)
+            finally:
+                _session_lock.release()
+                loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+
+        threading.Thread(target=worker, name='sampling-profiler', daemon=True).start()
+    except BaseException:
+        # The worker never started, so nothing else will release the session
+        _session_lock.release()
+        raise
+    await done
+    return sampler
@@ -3,61 +3,413 @@ from discord.ext import commands
 import asyncio
 import json
 import os
+from collections import Counter, deque
 from datetime import datetime
 
+from cog.performance_optimizations import perf_monitor
+
+DEFAULT_CONFIG = {
+    "create_channel_id": None,
+    "category_id": None,
+    "channel_name_template": "🎤 {user}'s Channel",
+    "max_channels_per_user": 3,
+    "delete_delay": 5,
+    "warm_pool_size": 0
+}
+# Settings that are shared defaults rather than ids of one guild's channels
+GUILD_SETTINGS = ("channel_name_template", "max_channels_per_user", "delete_delay", "warm_pool_size")
+
 class TempVoice(commands.Cog):
+    # Channel deletes in flight during bulk operations; discord.py still
+    # queues per route bucket and waits out 429s on top of this
+    BULK_CONCURRENCY = 5
+    # Seconds between progress message edits during vc reset
+    PROGRESS_INTERVAL = 2
+    # Upper bound for a guild's pool of pre-created hidden channels
+    MAX_WARM_POOL = 10
+    POOL_CHANNEL_NAME = "⏳ reserved"
+
     def __init__(self, bot):
         self.bot = bot
-        self.temp_channels = {}
+        self.channels_file = "tempvoice_channels.json"
+        records = self.load_channels()
+        self.temp_channels = {channel_id: data for channel_id, data in records.items() if not data.get("pooled")}
+        # Hidden pre-created channels waiting to be claimed, persisted with the registry
+        self.pool_channels = {channel_id: data for channel_id, data in records.items() if data.get("pooled")}
+        # guild_id -> ids of pool channels in claim order
+        self.warm_pool = {}
+        self.refill_tasks = {}
+        # (guild_id, owner_id) -> ids of the temp channels that owner has open
+        self.owner_index = {}
+        # guild_id -> open temp channels, published to the dashboard
+        self.guild_channel_counts = Counter()
+        for channel_id, data in self.temp_channels.items():
+            self.index_channel(channel_id, data)
+        # channel_id -> members currently connected, kept up to date from voice events
+        self.member_counts = {}
+        # channel_id -> pending delete timer, armed while the channel is empty
+        self.cleanup_timers = {}
+        # Running delete_if_empty tasks, referenced until done so they aren't garbage collected
+        self.cleanup_tasks = set()
         self.config_file = "tempvoice_config.json"
         self.load_config()
+        self.reconcile_task = self.bot.loop.create_task(self.reconcile_channels())
+
+    def cog_unload(self):
+        self.reconcile_task.cancel()
+        for task in self.refill_tasks.values():
+            task.cancel()
+        for timer in self.cleanup_timers.values():
+            timer.cancel()
+        self.cleanup_timers.clear()
+        for task in self.cleanup_tasks:
+            task.cancel()
         
     def load_config(self):
-        """Load TempVoice configuration from file"""
-        if os.path.exists(self.config_file):
-            with open(self.config_file, 'r') as f:
-                self.config = json.load(f)
-        else:
-            self.config = {
-                "create_channel_id": None,
-                "category_id": None,
-                "channel_name_template": "🎤 {user}'s Channel",
-                "max_channels_per_user": 3,
-                "delete_delay": 5
-            }
+        """Load TempVoice configuration from file
+
+        Layout: {"defaults": {...}, "guilds": {guild_id: {...}}}. Each guild's
+        entry is kept complete (defaults filled in) in self.guild_configs.
+        """
+        self.defaults = dict(DEFAULT_CONFIG)
+        self.guild_configs = {}
+        self.legacy_config = None
+        if not os.path.exists(self.config_file):
             self.save_config()
-    
+            self.rebuild_create_channel_ids()
+            return
+
+        with open(self.config_file, 'r') as f:
+            data = json.load(f)
+        if "guilds" not in data:
+            # Old single-guild layout; its guild is resolved once the cache is ready
+            self.legacy_config = data
+            self.defaults.update({key: data[key] for key in GUILD_SETTINGS if key in data})
+        else:
+            self.defaults.update(data.get("defaults", {}))
+            for guild_id, config in data["guilds"].items():
+                self.guild_configs[int(guild_id)] = {**self.defaults, **config}
+        self.rebuild_create_channel_ids()
+
     def save_config(self):
         """Save TempVoice configuration to file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=4)
+        data = {
+            "defaults": self.defaults,
+            "guilds": {str(guild_id): config for guild_id, config in self.guild_configs.items()}
+        }
+        with perf_monitor.timed_write('tempvoice_config'), open(self.config_file, 'w') as f:
+            json.dump(data, f, indent=4)
+
+    def rebuild_create_channel_ids(self):
+        """Refresh the set used to reject unrelated voice events"""
+        self.create_channel_ids = {
+            config["create_channel_id"] for config in self.guild_configs.values() if config.get("create_channel_id")
+        }
+
+    def guild_config(self, guild_id):
+        """Complete configuration of a guild"""
+        return self.guild_configs.get(guild_id, self.defaults)
+
+    def channel_config(self, channel_id):
+        """Configuration of the guild a temp channel belongs to"""
+        data = self.temp_channels.get(channel_id)
+        return self.guild_config(data.get("guild_id") if data else None)
+
+    def migrate_legacy_config(self):
+        """Move an old single-guild config under the guild owning its create channel"""
+        legacy, self.legacy_config = self.legacy_config, None
+        create_channel_id = legacy.get("create_channel_id")
+        create_channel = self.bot.get_channel(create_channel_id) if create_channel_id else None
+        if create_channel_id and create_channel is None:
+            print("TempVoice: legacy create channel not found, run !vc setup again")
+        elif create_channel is not None:
+            self.guild_configs[create_channel.guild.id] = {**self.defaults, **legacy}
+            self.rebuild_create_channel_ids()
+        self.save_config()
     
+    def load_channels(self):
+        """Load the temp channel registry from file"""
+        if os.path.exists(self.channels_file):
+            try:
+                with open(self.channels_file, 'r') as f:
+                    return {int(channel_id): data for channel_id, data in json.load(f).items()}
+            except (OSError, ValueError) as e:
+                print(f"Failed to load temp channel registry: {e}")
+        return {}
+
+    def owner_key(self, data):
+        """Owner index key of a registry record"""
+        return (data.get("guild_id"), int(data["owner"]))
+
+    def index_channel(self, channel_id, data):
+        """Add a temp channel to the owner index and the per-guild count"""
+        self.owner_index.setdefault(self.owner_key(data), set()).add(channel_id)
+        self.guild_channel_counts[data.get("guild_id")] += 1
+        self.bot.dispatch('tempvoice_update', data.get("guild_id"), self.guild_channel_counts[data.get("guild_id")])
+
+    def owned_channels(self, guild_id, owner_id):
+        """Ids of the temp channels a member owns in a guild"""
+        return self.owner_index.get((guild_id, owner_id), set())
+
+    def save_channels(self):
+        """Save the temp channel registry; only called when channels are created or deleted"""
+        with perf_monitor.timed_write('tempvoice_channels'), open(self.channels_file, 'w') as f:
+            json.dump({**self.temp_channels, **self.pool_channels}, f, indent=4)
+
+    async def reconcile_channels(self):
+        """Match the registry against real channels after a restart
+
+        One pass per guild: records of vanished channels are dropped, occupied
+        channels are kept (their owners keep control) and empty ones are
+        deleted concurrently. Records of guilds that are unavailable are kept.
+        """
+        await self.bot.wait_until_ready()
+        if self.legacy_config is not None:
+            self.migrate_legacy_config()
+
+        for channel_id, data in list(self.pool_channels.items()):
+            guild = self.bot.get_guild(data.get("guild_id") or 0)
+            if guild is None:
+                continue
+            if guild.get_channel(channel_id) is None:
+                del self.pool_channels[channel_id]
+            else:
+                self.warm_pool.setdefault(guild.id, deque()).append(channel_id)
+
+        by_guild = {}
+        for channel_id, data in self.temp_channels.items():
+            by_guild.setdefault(data.get("guild_id"), []).append(channel_id)
+
+        empty = []
+        changed = False
+        for guild_id, channel_ids in by_guild.items():
+            guild = self.bot.get_guild(guild_id) if guild_id else None
+            if guild is None:
+                continue
+            for channel_id in channel_ids:
+                channel = guild.get_channel(channel_id)
+                if channel is None:
+                    self.forget_channel(channel_id, save=False)
+                    changed = True
+                elif channel.members:
+                    self.resync_members(channel)
+                else:
+                    empty.append(channel)
+
+        deleted = await self.delete_channels(empty, reason="TempVoice: empty after restart")
+        for channel in empty:
+            # Failed deletes are retried by the normal cleanup timer
+            if channel.id in self.temp_channels:
+                self.resync_members(channel)
+        if changed or deleted:
+            self.save_channels()
+        for guild_id, config in self.guild_configs.items():
+            guild = self.bot.get_guild(guild_id)
+            if guild and (config.get("warm_pool_size") or self.warm_pool.get(guild_id)):
+                self.schedule_refill(guild)
+        if by_guild:
+            print(f"TempVoice registry reconciled: {len(self.temp_channels)} channel(s) kept, {deleted} empty deleted")
+
+    async def delete_channels(self, channels, reason=None, on_progress=None):
+        """Delete temp channels concurrently and forget them; returns how many are gone
+
+        ``on_progress(done, total)`` is awaited after each channel. The registry
+        is not saved here so callers can save once for the whole batch.
+        """
+        semaphore = asyncio.Semaphore(self.BULK_CONCURRENCY)
+        total = len(channels)
+        done = 0
+
+        async def delete(channel):
+            nonlocal done
+            async with semaphore:
+                try:
+                    await channel.delete(reason=reason)
+                    ok = True
+                except discord.NotFound:
+                    ok = True
+                except discord.HTTPException as e:
+                    print(f"Failed to delete temp channel {channel.id}: {e}")
+                    ok = False
+            if ok:
+                self.forget_channel(channel.id, save=False)
+            done += 1
+            if on_progress:
+                await on_progress(done, total)
+            return ok
+
+        return sum(await asyncio.gather(*(delete(channel) for channel in channels)))
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Resync member counts after a reconnect, voice events may have been missed meanwhile"""
+        for channel_id in list(self.temp_channels):
+            channel = self.bot.get_channel(channel_id)
+            if channel is not None:
+                self.resync_members(channel)
+
     @commands.Cog.listener()
     async def on_voice_state_update(self, member, before, after):
         """Handle voice channel join/leave events"""
-        if after.channel and after.channel.id == self.config.get("create_channel_id"):
+        if before.channel == after.channel:
+            return  # mute/deafen/stream changes
+        before_id = before.channel.id if before.channel else None
+        after_id = after.channel.id if after.channel else None
+        joined_create = after_id in self.create_channel_ids
+        if not joined_create and before_id not in self.temp_channels and after_id not in self.temp_channels:
+            return  # not a TempVoice channel
+
+        if before_id in self.temp_channels:
+            self.member_left(before_id)
+        if after_id in self.temp_channels:
+            self.member_joined(after_id)
+
+        if joined_create:
             await self.create_temp_channel(member, after.channel.guild)
-        
-        if before.channel and before.channel.id in self.temp_channels:
-            await self.check_channel_cleanup(before.channel)
+
+    def member_joined(self, channel_id):
+        """Count a join and cancel a pending delete"""
+        self.member_counts[channel_id] = self.member_counts.get(channel_id, 0) + 1
+        timer = self.cleanup_timers.pop(channel_id, None)
+        if timer:
+            timer.cancel()
+
+    def member_left(self, channel_id):
+        """Count a leave and arm the delete timer once the channel is empty"""
+        count = max(0, self.member_counts.get(channel_id, 0) - 1)
+        self.member_counts[channel_id] = count
+        if count == 0:
+            self.arm_cleanup(channel_id)
+
+    def resync_members(self, channel):
+        """Replace the counted members with the cache; arm cleanup if it is really empty
+
+        Covers a missed leave, which would otherwise keep a count above zero
+        and no delete timer forever.
+        """
+        self.member_counts[channel.id] = len(channel.members)
+        if not channel.members and channel.id not in self.cleanup_timers:
+            self.arm_cleanup(channel.id)
+
+    def arm_cleanup(self, channel_id):
+        """(Re)start the single delete timer of an empty temp channel"""
+        timer = self.cleanup_timers.pop(channel_id, None)
+        if timer:
+            timer.cancel()
+        self.cleanup_timers[channel_id] = asyncio.get_running_loop().call_later(
+            self.channel_config(channel_id)["delete_delay"],
+            self.start_cleanup, channel_id
+        )
+
+    def start_cleanup(self, channel_id):
+        """Timer callback: run delete_if_empty as a tracked task"""
+        task = asyncio.create_task(self.delete_if_empty(channel_id))
+        self.cleanup_tasks.add(task)
+        task.add_done_callback(self.cleanup_tasks.discard)
+
+    def forget_channel(self, channel_id, save=True):
+        """Drop all state of a temp channel"""
+        data = self.temp_channels.pop(channel_id, None)
+        if data is not None:
+            key = self.owner_key(data)
+            owned = self.owner_index.get(key)
+            if owned is not None:
+                owned.discard(channel_id)
+                if not owned:
+                    del self.owner_index[key]
+            guild_id = data.get("guild_id")
+            self.guild_channel_counts[guild_id] -= 1
+            if self.guild_channel_counts[guild_id] <= 0:
+                del self.guild_channel_counts[guild_id]
+            self.bot.dispatch('tempvoice_update', guild_id, self.guild_channel_counts[guild_id])
+        self.member_counts.pop(channel_id, None)
+        timer = self.cleanup_timers.pop(channel_id, None)
+        if timer:
+            timer.cancel()
+        if data is not None and save:
+            self.save_channels()
     
+    def resolve_category(self, guild, config):
+        """Configured category, else the guild's first one (None if it has none)"""
+        category = guild.get_channel(config.get("category_id"))
+        if not category:
+            category = guild.categories[0] if guild.categories else None
+        return category
+
+    def schedule_refill(self, guild):
+        """Top the guild's warm pool back up in the background"""
+        task = self.refill_tasks.get(guild.id)
+        if task is None or task.done():
+            self.refill_tasks[guild.id] = asyncio.create_task(self.refill_pool(guild))
+
+    async def refill_pool(self, guild):
+        """Create or delete hidden pool channels until the pool matches warm_pool_size"""
+        pool = self.warm_pool.setdefault(guild.id, deque())
+        try:
+            # Re-read the config every round so `vc pool` changes apply mid-refill
+            while len(pool) < self.guild_config(guild.id).get("warm_pool_size", 0):
+                category = self.resolve_category(guild, self.guild_config(guild.id))
+                channel = await guild.create_voice_channel(
+                    name=self.POOL_CHANNEL_NAME,
+                    category=category,
+                    overwrites={
+                        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+                        guild.me: discord.PermissionOverwrite(view_channel=True, connect=True, manage_channels=True)
+                    },
+                    reason="TempVoice warm pool"
+                )
+                self.pool_channels[channel.id] = {
+                    "guild_id": guild.id,
+                    "pooled": True,
+                    "created_at": datetime.now().isoformat()
+                }
+                pool.append(channel.id)
+                self.save_channels()
+
+            while len(pool) > self.guild_config(guild.id).get("warm_pool_size", 0):
+                channel_id = pool.pop()
+                self.pool_channels.pop(channel_id, None)
+                channel = guild.get_channel(channel_id)
+                if channel:
+                    await channel.delete(reason="TempVoice warm pool shrunk")
+                self.save_channels()
+        except discord.NotFound:
+            pass
+        except Exception as e:
+            print(f"Error refilling TempVoice pool for {guild.name}: {e}")
+
+    async def claim_pool_channel(self, guild, name, overwrites):
+        """Turn a hidden pool channel into a user's channel with a single edit"""
+        pool = self.warm_pool.get(guild.id)
+        while pool:
+            channel_id = pool.popleft()
+            self.pool_channels.pop(channel_id, None)
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            try:
+                # New overwrites replace the hiding ones, so this also unhides it
+                await channel.edit(name=name, overwrites=overwrites, reason="TempVoice channel claimed")
+                return channel
+            except discord.HTTPException as e:
+                print(f"Failed to claim pooled channel {channel_id}: {e}")
+        return None
+
     async def create_temp_channel(self, member, guild):
         """Create a temporary voice channel for a user"""
         user_id = str(member.id)
+        config = self.guild_config(guild.id)
         
-        user_channels = [c for c in self.temp_channels.values() if c['owner'] == user_id]
-        if len(user_channels) >= self.config["max_channels_per_user"]:
+        if len(self.owned_channels(guild.id, member.id)) >= config["max_channels_per_user"]:
             try:
-                await member.send(f"You have reached the maximum of {self.config['max_channels_per_user']} temporary channels!")
+                await member.send(f"You have reached the maximum of {config['max_channels_per_user']} temporary channels!")
             except:
                 pass
             return
         
-        category = guild.get_channel(self.config.get("category_id"))
-        if not category:
-            category = guild.categories[0] if guild.categories else None
+        category = self.resolve_category(guild, config)
         
-        channel_name = self.config["channel_name_template"].format(user=member.display_name)
+        channel_name = config["channel_name_template"].format(user=member.display_name)
         
         overwrites = {
             guild.default_role: discord.PermissionOverwrite(view_channel=True, connect=True),
@@ -65,18 +417,29 @@ class TempVoice(commands.Cog):
         }
         
         try:
-            channel = await guild.create_voice_channel(
-                name=channel_name,
-                category=category,
-                overwrites=overwrites
-            )
+            channel = None
+            if config.get("warm_pool_size"):
+                channel = await self.claim_pool_channel(guild, channel_name, overwrites)
+                self.schedule_refill(guild)
+            if channel is None:
+                channel = await guild.create_voice_channel(
+                    name=channel_name,
+                    category=category,
+                    overwrites=overwrites
+                )
             
             self.temp_channels[channel.id] = {
                 "owner": user_id,
+                "guild_id": guild.id,
                 "created_at": datetime.now().isoformat(),
                 "original_name": channel_name
             }
-            
+            self.index_channel(channel.id, self.temp_channels[channel.id])
+            self.save_channels()
+            # Empty until the move below lands; cleans up if the user already left the lobby
+            self.member_counts[channel.id] = 0
+            self.arm_cleanup(channel.id)
+
             await member.move_to(channel)
             
             embed = discord.Embed(
@@ -88,7 +451,7 @@ class TempVoice(commands.Cog):
                            f"• Unlock: `!vc unlock`\n"
                            f"• Limit: `!vc limit <number>`\n"
                            f"• Delete: `!vc delete`\n\n"
-                           f"Channel will auto-delete when empty for {self.config['delete_delay']} seconds.",
+                           f"Channel will auto-delete when empty for {config['delete_delay']} seconds.",
                 color=discord.Color.green()
             )
             try:
@@ -101,24 +464,40 @@ class TempVoice(commands.Cog):
         except Exception as e:
             print(f"Error creating temp channel: {e}")
     
-    async def check_channel_cleanup(self, channel):
-        """Check if a temporary channel should be deleted"""
-        if channel.id not in self.temp_channels:
+    async def delete_if_empty(self, channel_id):
+        """Delete a temp channel whose cleanup timer fired"""
+        self.cleanup_timers.pop(channel_id, None)
+        if channel_id not in self.temp_channels or self.member_counts.get(channel_id, 0) > 0:
             return
-        
-        if len(channel.members) == 0:
-            await asyncio.sleep(self.config["delete_delay"])
-            
-            try:
-                fresh_channel = channel.guild.get_channel(channel.id)
-                if fresh_channel and len(fresh_channel.members) == 0:
-                    await fresh_channel.delete()
-                    del self.temp_channels[channel.id]
-            except discord.NotFound:
-                if channel.id in self.temp_channels:
-                    del self.temp_channels[channel.id]
-            except Exception as e:
-                print(f"Error deleting temp channel: {e}")
+
+        channel = self.bot.get_channel(channel_id)
+        if channel is None:
+            self.forget_channel(channel_id)
+            return
+        if channel.members:
+            # Missed a voice event (e.g. across a reconnect); trust the cache and resync
+            self.resync_members(channel)
+            return
+
+        try:
+            await channel.delete()
+            self.forget_channel(channel_id)
+        except discord.NotFound:
+            self.forget_channel(channel_id)
+        except Exception as e:
+            print(f"Error deleting temp channel: {e}")
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Forget temp channels deleted by hand"""
+        if channel.id in self.temp_channels:
+            self.forget_channel(channel.id)
+        elif channel.id in self.pool_channels:
+            del self.pool_channels[channel.id]
+            pool = self.warm_pool.get(channel.guild.id)
+            if pool and channel.id in pool:
+                pool.remove(channel.id)
+            self.save_channels()
     
     @commands.group(name="vc", invoke_without_command=True)
     async def voice_commands(self, ctx):
@@ -134,13 +513,15 @@ class TempVoice(commands.Cog):
                   "`!vc lock` - Lock your channel\n"
                   "`!vc unlock` - Unlock your channel\n"
                   "`!vc limit <number>` - Set user limit\n"
-                  "`!vc delete` - Delete your channel",
+                  "`!vc delete` - Delete your channel\n"
+                  "`!vc mine` - List your channels",
             inline=False
         )
         embed.add_field(
             name="Admin Commands",
             value="`!vc setup` - Setup TempVoice system\n"
-                  "`!vc config` - View current configuration",
+                  "`!vc config` - View current configuration\n"
+                  "`!vc pool <size>` - Pre-create hidden channels for faster joins",
             inline=False
         )
         await ctx.send(embed=embed)
@@ -235,13 +616,36 @@ class TempVoice(commands.Cog):
         
         try:
             await channel.delete()
-            del self.temp_channels[channel.id]
+            self.forget_channel(channel.id)
             await ctx.send("🗑️ Channel deleted!")
         except discord.Forbidden:
             await ctx.send("❌ I don't have permission to delete this channel!")
         except discord.NotFound:
             await ctx.send("❌ Channel not found!")
 
+    @voice_commands.command(name="mine")
+    async def vc_mine(self, ctx):
+        """List your temporary voice channels in this server"""
+        channel_ids = self.owned_channels(ctx.guild.id, ctx.author.id)
+        if not channel_ids:
+            await ctx.send("❌ You don't have any temporary channels!")
+            return
+
+        lines = []
+        for channel_id in channel_ids:
+            channel = ctx.guild.get_channel(channel_id)
+            if channel:
+                lines.append(f"{channel.mention} - {self.member_counts.get(channel_id, 0)} connected")
+
+        embed = discord.Embed(
+            title="🎤 Your Temporary Channels",
+            description="\n".join(lines) or "None",
+            color=discord.Color.blue()
+        )
+        max_channels = self.guild_config(ctx.guild.id)['max_channels_per_user']
+        embed.set_footer(text=f"{len(channel_ids)}/{max_channels} channels used")
+        await ctx.send(embed=embed)
+
     @voice_commands.command(name="setup")
     @commands.has_permissions(manage_channels=True)
     async def vc_setup(self, ctx):
@@ -262,8 +666,10 @@ class TempVoice(commands.Cog):
         )
         
         # Update config
-        self.config["create_channel_id"] = create_channel.id
-        self.config["category_id"] = category.id
+        config = self.guild_configs.setdefault(ctx.guild.id, dict(self.defaults))
+        config["create_channel_id"] = create_channel.id
+        config["category_id"] = category.id
+        self.rebuild_create_channel_ids()
         self.save_config()
         
         embed.add_field(
@@ -275,12 +681,29 @@ class TempVoice(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @voice_commands.command(name="pool")
+    @commands.has_permissions(manage_channels=True)
+    async def vc_pool(self, ctx, size: int):
+        """Keep this many hidden channels pre-created for instant claims (Admin only)"""
+        if size < 0 or size > self.MAX_WARM_POOL:
+            await ctx.send(f"❌ Pool size must be between 0 and {self.MAX_WARM_POOL}!")
+            return
+
+        config = self.guild_configs.setdefault(ctx.guild.id, dict(self.defaults))
+        config["warm_pool_size"] = size
+        self.save_config()
+        self.schedule_refill(ctx.guild)
+        category = self.resolve_category(ctx.guild, config)
+        where = f"in **{category.name}**" if category else "outside any category"
+        await ctx.send(f"✅ Warm pool size set to **{size}** (channels are created {where})")
+
     @voice_commands.command(name="config")
     @commands.has_permissions(manage_channels=True)
     async def vc_config(self, ctx):
         """View current TempVoice configuration (Admin only)"""
-        create_channel = ctx.guild.get_channel(self.config.get("create_channel_id"))
-        category = ctx.guild.get_channel(self.config.get("category_id"))
+        config = self.guild_config(ctx.guild.id)
+        create_channel = ctx.guild.get_channel(config.get("create_channel_id"))
+        category = ctx.guild.get_channel(config.get("category_id"))
         
         embed = discord.Embed(
             title="⚙️ TempVoice Configuration",
@@ -291,9 +714,10 @@ class TempVoice(commands.Cog):
             name="Channel Settings",
             value=f"**Creation Channel:** {create_channel.mention if create_channel else 'Not set'}\n"
                   f"**Category:** {category.name if category else 'Not set'}\n"
-                  f"**Channel Template:** {self.config['channel_name_template']}\n"
-                  f"**Max Channels/User:** {self.config['max_channels_per_user']}\n"
-                  f"**Delete Delay:** {self.config['delete_delay']}s",
+                  f"**Channel Template:** {config['channel_name_template']}\n"
+                  f"**Max Channels/User:** {config['max_channels_per_user']}\n"
+                  f"**Delete Delay:** {config['delete_delay']}s\n"
+                  f"**Warm Pool:** {len(self.warm_pool.get(ctx.guild.id, ()))}/{config.get('warm_pool_size', 0)}",
             inline=False
         )
         
@@ -302,23 +726,37 @@ class TempVoice(commands.Cog):
     @voice_commands.command(name="reset")
     @commands.has_permissions(manage_channels=True)
     async def vc_reset(self, ctx):
-        """Reset all temporary channels (Admin only)"""
-        deleted = 0
-        for channel_id in list(self.temp_channels.keys()):
+        """Reset all temporary channels of this server (Admin only)"""
+        channels = []
+        for channel_id, data in list(self.temp_channels.items()):
+            if data.get("guild_id") != ctx.guild.id:
+                continue
             channel = ctx.guild.get_channel(channel_id)
             if channel:
+                channels.append(channel)
+            else:
+                self.forget_channel(channel_id, save=False)
+
+        status = await ctx.send(f"🧹 Deleting {len(channels)} temporary channels...")
+        last_update = asyncio.get_running_loop().time()
+
+        async def report(done, total):
+            nonlocal last_update
+            now = asyncio.get_running_loop().time()
+            if done < total and now - last_update >= self.PROGRESS_INTERVAL:
+                last_update = now
                 try:
-                    await channel.delete()
-                    deleted += 1
-                except:
+                    await status.edit(content=f"🧹 Deleting temporary channels... {done}/{total}")
+                except discord.HTTPException:
                     pass
-            del self.temp_channels[channel_id]
-        
-        self.save_config()
-        await ctx.send(f"🧹 Reset complete! Deleted {deleted} temporary channels.")
+
+        deleted = await self.delete_channels(channels, reason=f"TempVoice reset by {ctx.author}", on_progress=report)
+        self.save_channels()
+        await status.edit(content=f"🧹 Reset complete! Deleted {deleted} temporary channels.")
 
     @vc_setup.error
     @vc_config.error
+    @vc_pool.error
     @vc_reset.error
     async def vc_admin_error(self, ctx, error):
         if isinstance(error, commands.MissingPermissions):
@@ -403,7 +403,10 @@ async def setup_optimizations():
     """Setup performance optimizations"""
     try:
         from cog.performance_optimizations import setup_performance_optimizations
+        from cog.memory_diagnostics import register_structure
         await setup_performance_optimizations(bot)
+        register_structure('economy.user_balances', lambda: user_balances)
+        register_structure('economy.user_inventory', lambda: user_inventory)
         print("✅ Performance optimizations loaded successfully")
     except ImportError:
         print("⚠️ Performance optimizations module not found")
@@ -414,8 +417,17 @@ if __name__ == "__main__":
         # Use setup_hook for async initialization
         async def setup_hook():
             await setup_optimizations()
+            # Serve the web dashboard process (start_enhanced_bot_and_web.py)
+            try:
+                await bot.load_extension('cog.dashboard_ipc')
+            except Exception as e:
+                print(f"⚠️ Dashboard IPC not started: {e}")
         
         bot.setup_hook = setup_hook
-        bot.run(TOKEN)
+
+        # Queue-based logging, configured once; stops discord.py adding its own blocking handler
+        from cog.performance_optimizations import setup_logging
+        setup_logging()
+        bot.run(TOKEN, log_handler=None)
     else:
         print("❌ Error: DISCORD_TOKEN not found in environment variables")
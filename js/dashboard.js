@@ -4,6 +4,10 @@ class Dashboard {
         this.currentUser = null;
         this.guilds = [];
         this.currentSection = 'overview';
+        this.events = null;
+        this.musicState = 'idle';
+        // guild id -> open temp voice channels, kept current by /api/events
+        this.tempVoiceCounts = {};
         this.init();
     }
 
@@ -12,6 +16,7 @@ class Dashboard {
         this.setupNavigation();
         this.setupEventListeners();
         this.loadDashboardData();
+        this.connectEvents();
     }
 
     async checkAuth() {
@@ -98,12 +103,7 @@ class Dashboard {
 
     async loadDashboardData() {
         try {
-            // Load bot status
-            const statusResponse = await fetch('/api/bot/status');
-            const statusData = await statusResponse.json();
-            this.updateBotStatus(statusData);
-
-            // Load user guilds
+            // Bot status arrives over /api/events; load user guilds
             const guildsResponse = await fetch('/api/user/guilds');
             const guildsData = await guildsResponse.json();
             this.guilds = guildsData.guilds;
@@ -113,9 +113,38 @@ class Dashboard {
         }
     }
 
+    connectEvents() {
+        // Server pushes status, music and temp voice changes; EventSource reconnects by itself
+        this.events = new EventSource('/api/events');
+
+        // Each (re)connect starts with the full current state
+        this.events.addEventListener('open', () => {
+            this.tempVoiceCounts = {};
+            this.updateTempVoiceDisplay();
+        });
+
+        this.events.addEventListener('status', (e) => {
+            this.updateBotStatus(JSON.parse(e.data));
+        });
+
+        this.events.addEventListener('music', (e) => {
+            const data = JSON.parse(e.data);
+            if (data.guild_id === document.getElementById('music-server-select').value) {
+                this.updateMusicDisplay(data);
+            }
+        });
+
+        this.events.addEventListener('tempvoice', (e) => {
+            const data = JSON.parse(e.data);
+            this.tempVoiceCounts[data.guild_id] = data.channels;
+            this.updateTempVoiceDisplay();
+        });
+    }
+
     updateBotStatus(data) {
         document.getElementById('total-servers').textContent = data.guilds || 0;
         document.getElementById('total-users').textContent = data.users || 0;
+        document.getElementById('active-players').textContent = data.active_players || 0;
         document.getElementById('bot-status').textContent = data.status || 'Offline';
     }
 
@@ -226,6 +255,32 @@ class Dashboard {
         if (data.currentTrack?.thumbnail) {
             document.getElementById('current-thumbnail').src = data.currentTrack.thumbnail;
         }
+
+        this.musicState = data.state || 'idle';
+        document.getElementById('play-icon').className = data.state === 'playing' ? 'fas fa-pause' : 'fas fa-play';
+
+        const queueList = document.getElementById('queue-list');
+        if (!data.queue || data.queue.length === 0) {
+            queueList.innerHTML = '<p>Antrian kosong</p>';
+            return;
+        }
+        // Titles come from whoever uploaded the video, so never parse them as HTML
+        queueList.replaceChildren(...data.queue.map((track, index) => {
+            const item = document.createElement('div');
+            item.className = 'queue-item';
+            item.textContent = `${index + 1}. ${track.title}`;
+            return item;
+        }));
+    }
+
+    selectTempVoiceServer(guildId) {
+        this.updateTempVoiceDisplay();
+    }
+
+    updateTempVoiceDisplay() {
+        // Guilds without open channels never get an event, so they count as 0
+        const guildId = document.getElementById('tempvoice-server-select').value;
+        document.getElementById('tempvoice-active').textContent = this.tempVoiceCounts[guildId] || 0;
     }
 
     async musicAction(action) {
@@ -235,13 +290,27 @@ class Dashboard {
             return;
         }
 
+        // Buttons map onto the bot's player actions
+        const actions = {
+            next: 'skip',
+            playpause: this.musicState === 'paused' ? 'resume' : 'pause',
+            stop: 'stop'
+        };
+        if (!actions[action]) {
+            alert('Aksi ini belum didukung');
+            return;
+        }
+
         try {
-            const response = await fetch(`/api/music/${guildId}/${action}`, {
+            const response = await fetch(`/api/music/${guildId}/${actions[action]}`, {
                 method: 'POST'
             });
+            const data = await response.json();
             
             if (response.ok) {
-                this.selectMusicServer(guildId); // Refresh data
+                this.updateMusicDisplay(data.player);
+            } else {
+                alert(data.error || 'Aksi musik gagal');
             }
         } catch (error) {
             console.error('Error music action:', error);
@@ -285,6 +354,9 @@ class Dashboard {
     }
 
     async logout() {
+        if (this.events) {
+            this.events.close();
+        }
         try {
             await fetch('/auth/logout');
             window.location.href = '/login';
@@ -10,6 +10,8 @@ import threading
 import time
 from dotenv import load_dotenv
 
+from cog.dashboard_ipc import ipc_address, parse_address
+
 # Load environment variables
 load_dotenv()
 
@@ -17,6 +19,7 @@ load_dotenv()
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 DISCORD_CLIENT_ID = os.getenv('DISCORD_CLIENT_ID')
 DISCORD_CLIENT_SECRET = os.getenv('DISCORD_CLIENT_SECRET')
+WEB_PORT = int(os.getenv('WEB_PORT', '5000'))
 
 def check_environment():
     """Check if all required environment variables are set"""
@@ -37,6 +40,13 @@ def check_environment():
         print("  DISCORD_CLIENT_SECRET: Your Discord application's client secret")
         print("  DISCORD_TOKEN: Your Discord bot token")
         return False
+
+    # The bot refuses to serve dashboard IPC over TCP (the Windows default) without a token
+    address = ipc_address()
+    if address and parse_address(address)[0] == 'tcp' and not os.getenv('DASHBOARD_IPC_TOKEN'):
+        print(f"❌ DASHBOARD_IPC_TOKEN is required for the TCP dashboard IPC address {address}")
+        print("\nSet it in your .env file to any long random string")
+        return False
     return True
 
 def start_discord_bot():
@@ -50,12 +60,13 @@ def start_discord_bot():
         print(f"❌ Error starting Discord bot: {e}")
 
 def start_web_server():
-    """Start the Flask web server"""
+    """Start the ASGI web server"""
     print("🌐 Starting web server...")
     try:
         # Import and run the web server
+        import uvicorn
         from web_server import app
-        app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
+        uvicorn.run(app, host='0.0.0.0', port=WEB_PORT, log_config=None)
     except Exception as e:
         print(f"❌ Error starting web server: {e}")
 
@@ -70,12 +81,19 @@ def main():
     
     # Create necessary directories
     os.makedirs('./flask_session', exist_ok=True)
+
+    # Non-blocking logging for the web server process
+    from cog.performance_optimizations import setup_logging
+    setup_logging()
     
     # Start services
     print("\n📋 Starting services:")
-    print("1. Discord Bot - Running enhanced_bot.py")
-    print("2. Web Server - http://localhost:5000")
-    print("3. Web UI - http://localhost:5000")
+    address = ipc_address()
+    print(f"1. Discord Bot - Running enhanced_bot.py (dashboard IPC on {address or 'off'})")
+    if address and parse_address(address)[0] == 'tcp':
+        print("   TCP IPC, authenticated with DASHBOARD_IPC_TOKEN (required on Windows)")
+    print(f"2. Web Server - http://localhost:{WEB_PORT}")
+    print(f"3. Web UI - http://localhost:{WEB_PORT}")
     
     # Start Discord bot in background thread
     bot_thread = threading.Thread(target=start_discord_bot, daemon=True)
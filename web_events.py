@@ -0,0 +1,191 @@
+"""
+Server-Sent Events for the Quart dashboard
+One hub diffs every new bot snapshot once and fans the resulting events out to all
+connected dashboards through bounded per-client queues
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from cog.dashboard_state import EMPTY_SNAPSHOT, BotSnapshot
+
+logger = logging.getLogger('performance')
+
+# (event name, guild id or None for global events, data)
+Event = Tuple[str, Optional[int], Dict[str, Any]]
+# Guild ids a client may see, given the current snapshot
+AccessCheck = Callable[[BotSnapshot], Awaitable[Iterable[int]]]
+
+
+def status_payload(snapshot: BotSnapshot) -> Dict[str, Any]:
+    """Bot status as served by /api/bot/status, minus the ever-changing uptime"""
+    if not snapshot.ready:
+        return {"status": "offline", "guilds": 0, "users": 0}
+    return {
+        "status": "online",
+        "guilds": len(snapshot.guilds),
+        "users": snapshot.user_count,
+        "active_players": sum(1 for player in snapshot.music if player.current),
+        "started_at": datetime.fromtimestamp(snapshot.started_at).isoformat(),
+        "shards": {str(shard_id): state for shard_id, state in snapshot.shards},
+    }
+
+
+def snapshot_events(previous: BotSnapshot, current: BotSnapshot) -> List[Event]:
+    """What changed between two snapshots, as dashboard events"""
+    events: List[Event] = []
+    status = status_payload(current)
+    if status != status_payload(previous):
+        events.append(("status", None, status))
+
+    for guild_id in previous.music_index.keys() | current.music_index.keys():
+        player = current.player(guild_id)
+        if player != previous.player(guild_id):
+            events.append(("music", guild_id, player.to_dict()))
+
+    old_counts, new_counts = dict(previous.tempvoice), dict(current.tempvoice)
+    for guild_id in old_counts.keys() | new_counts.keys():
+        if old_counts.get(guild_id, 0) != new_counts.get(guild_id, 0):
+            events.append(("tempvoice", guild_id, {"guild_id": str(guild_id), "channels": new_counts.get(guild_id, 0)}))
+    return events
+
+
+def encode_event(name: str, data: Dict[str, Any]) -> bytes:
+    return f"event: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode('utf-8')
+
+
+class EventClient:
+    """One dashboard connection: its guild filter and a bounded queue of encoded events"""
+
+    def __init__(self, access: AccessCheck, max_events: int):
+        self.access = access
+        self.guild_ids: Set[int] = set()
+        self.queue: asyncio.Queue = asyncio.Queue(max_events)
+        self.overflowed = False
+        self.refresh_task: Optional[asyncio.Task] = None
+        self.refresh_again = False
+        self.refreshed_at = 0.0
+
+    def offer(self, guild_id: Optional[int], frame: bytes):
+        if self.overflowed or (guild_id is not None and guild_id not in self.guild_ids):
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            # Too slow to keep up: end the stream, EventSource reconnects and gets fresh state
+            self.overflowed = True
+            self.end()
+
+    def end(self):
+        """Drop anything queued and make the stream finish"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class EventHub:
+    """Listens to a bridge's snapshots and feeds every EventClient"""
+
+    MAX_CLIENT_EVENTS = 100
+    KEEPALIVE_INTERVAL = 15.0
+    RETRY_MS = 3000
+    # Re-check each client's guilds this often, so lost admin rights stop its events
+    ACCESS_REFRESH_INTERVAL = 60.0
+
+    def __init__(self, source):
+        self.source = source
+        self.clients: Set[EventClient] = set()
+        self.previous: BotSnapshot = source.snapshot
+        source.add_listener(self.on_snapshot)
+
+    def close(self):
+        self.source.remove_listener(self.on_snapshot)
+        for client in self.clients:
+            client.end()
+            if client.refresh_task is not None:
+                client.refresh_task.cancel()
+        self.clients.clear()
+
+    def on_snapshot(self, snapshot: BotSnapshot):
+        """Diff once, encode once, then fan out; runs on the web loop"""
+        events = snapshot_events(self.previous, snapshot)
+        # Coming online, going offline or joining/leaving guilds changes what clients may see
+        access_changed = (snapshot.ready != self.previous.ready
+                          or snapshot.guild_index.keys() != self.previous.guild_index.keys())
+        self.previous = snapshot
+        if access_changed:
+            for client in list(self.clients):
+                self.schedule_refresh(client)
+        if not events or not self.clients:
+            return
+        frames = [(guild_id, encode_event(name, data)) for name, guild_id, data in events]
+        for client in list(self.clients):
+            for guild_id, frame in frames:
+                client.offer(guild_id, frame)
+
+    def connect(self, access: AccessCheck) -> EventClient:
+        """Register a dashboard, primed with the current status; guild state follows its access check"""
+        client = EventClient(access, self.MAX_CLIENT_EVENTS)
+        client.queue.put_nowait(f"retry: {self.RETRY_MS}\n\n".encode('utf-8'))
+        # Status always, so a dashboard connecting while the bot is offline shows it
+        client.offer(None, encode_event("status", status_payload(self.previous)))
+        self.clients.add(client)
+        self.schedule_refresh(client)
+        return client
+
+    def disconnect(self, client: EventClient):
+        self.clients.discard(client)
+        if client.refresh_task is not None:
+            client.refresh_task.cancel()
+
+    def schedule_refresh(self, client: EventClient):
+        """Re-run a client's access check, once more if one is already in flight"""
+        if client.refresh_task is not None and not client.refresh_task.done():
+            client.refresh_again = True
+            return
+        client.refresh_task = asyncio.create_task(self.refresh_access(client))
+
+    async def refresh_access(self, client: EventClient):
+        """Update a client's guilds and send the current state of newly visible ones"""
+        while True:
+            client.refresh_again = False
+            snapshot = self.previous
+            guild_ids: Set[int] = set()
+            if snapshot.ready:
+                try:
+                    guild_ids = set(await client.access(snapshot))
+                except Exception as e:
+                    # Fail closed: no guild events until the next check succeeds
+                    logger.warning("Dashboard event access check failed: %s", e)
+            added = guild_ids - client.guild_ids
+            client.guild_ids = guild_ids
+            client.refreshed_at = time.monotonic()
+            if added:
+                for name, guild_id, data in snapshot_events(EMPTY_SNAPSHOT, self.previous):
+                    if guild_id in added:
+                        client.offer(guild_id, encode_event(name, data))
+            if not client.refresh_again:
+                return
+
+    async def stream(self, client: EventClient) -> AsyncIterator[bytes]:
+        """Encoded events for one client until it overflows or disconnects"""
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(client.queue.get(), self.KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    if time.monotonic() - client.refreshed_at >= self.ACCESS_REFRESH_INTERVAL:
+                        self.schedule_refresh(client)
+                    yield b': keepalive\n\n'
+                    continue
+                if frame is None:
+                    if client.overflowed:
+                        logger.warning("Closed a dashboard event stream that fell behind")
+                    return
+                yield frame
+        finally:
+            self.disconnect(client)
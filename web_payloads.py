@@ -0,0 +1,60 @@
+"""
+Precomputed JSON responses for the Quart dashboard
+Payloads that only change with the bot's state are serialized and compressed once,
+then served with a strong ETag so revalidation costs a header comparison
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from quart import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class PrecompressedJSON:
+    """One JSON body with its gzip/brotli variants, each with a strong ETag"""
+
+    def __init__(self, data: Any, cache_control: str):
+        self.body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.cache_control = cache_control
+        self.encoded: Dict[str, bytes] = {'gzip': gzip.compress(self.body, compresslevel=9)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.body, quality=11)
+        # Encoded bytes differ, so each variant gets its own strong validator
+        self.etags: Dict[Optional[str], str] = {None: f'"{digest}"'}
+        self.etags.update({encoding: f'"{digest}-{encoding}"' for encoding in self.encoded})
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match check (weak comparison, as RFC 9110 asks for GET)"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return not tags.isdisjoint(self.etags.values())
+
+    def response(self, request) -> Response:
+        """200 with the best encoding the client accepts, or 304 if it has this version"""
+        encoding = next(
+            (name for name in ('br', 'gzip') if name in self.encoded and request.accept_encodings[name]),
+            None
+        )
+        headers = {
+            'ETag': self.etags[encoding],
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding',
+        }
+        if self.matches(request.headers.get('If-None-Match')):
+            return Response(b'', status=304, headers=headers)
+
+        if encoding is None:
+            return Response(self.body, status=200, headers=headers, content_type='application/json')
+        headers['Content-Encoding'] = encoding
+        return Response(self.encoded[encoding], status=200, headers=headers, content_type='application/json')
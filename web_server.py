@@ -1,6 +1,5 @@
-from flask import Flask, jsonify, request, session, redirect, url_for, send_from_directory
-from flask_cors import CORS
-from flask_session import Session
+from quart import Quart, jsonify, request, session, redirect, send_from_directory, make_response
+from quart_cors import cors
 import discord
 from discord.ext import commands
 import asyncio
@@ -9,32 +8,61 @@ import json
 import os
 import random
 import aiohttp
-from datetime import datetime
-import requests
+import time
+from datetime import timedelta
 from urllib.parse import urlencode
 
-app = Flask(__name__)
-CORS(app, supports_credentials=True)
+from bot_bridge import BotBridge, BridgeError, BridgeTimeout, IpcBotBridge
+from cog.dashboard_ipc import ipc_address
+from web_events import EventHub, status_payload
+from web_payloads import PrecompressedJSON
+from web_sessions import FileSessionInterface
+
+app = Quart(__name__)
+app = cors(
+    app,
+    allow_origin=[origin.strip() for origin in os.getenv('DASHBOARD_ORIGINS', 'http://localhost:5000').split(',')],
+    allow_credentials=True
+)
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_FILE_DIR'] = './flask_session'
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
 app.config['SESSION_COOKIE_SECURE'] = False  # Set to True in production with HTTPS
 
-Session(app)
+# Server-side sessions: the OAuth guild list is too big for a cookie
+app.session_interface = FileSessionInterface(os.getenv('SESSION_FILE_DIR', './flask_session'))
 
 # Discord OAuth Configuration
 DISCORD_CLIENT_ID = os.getenv('DISCORD_CLIENT_ID')
 DISCORD_CLIENT_SECRET = os.getenv('DISCORD_CLIENT_SECRET')
 DISCORD_REDIRECT_URI = os.getenv('https://discord.com/oauth2/authorize?client_id=1399824318644621402&permissions=8&response_type=code&redirect_uri=https%3A%2F%2Fdiscord.com%2Foauth2%2Fauthorize%3Fclient_i', 'http://localhost:5000/auth/callback')
 DISCORD_BOT_TOKEN = os.getenv('DISCORD_TOKEN')
-
-# Global bot instance
+# Overridable so OAuth can be pointed at a local stub for load tests
+DISCORD_API_BASE = os.getenv('DISCORD_API_BASE', 'https://discord.com/api').rstrip('/')
+OAUTH_TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+# Pooled HTTP client for OAuth calls, opened with the server
+http_session = None
+# Fans bot snapshot changes out to /api/events streams, created with the server
+event_hub = None
+
+# Global bot instance; routes only reach it through the bridge.
+# Imported on its own (start_enhanced_bot_and_web.py, uvicorn) the app talks to a
+# separate bot process over IPC; run as a script it hosts its own bot thread.
 bot = None
-bot_ready = False
+DASHBOARD_IPC_ADDRESS = ipc_address()
+bridge = IpcBotBridge(DASHBOARD_IPC_ADDRESS, os.getenv('DASHBOARD_IPC_TOKEN', '')) if DASHBOARD_IPC_ADDRESS else BotBridge()
+
+# /api/commands body, rebuilt only when the bot publishes a new command catalog
+COMMANDS_CACHE_CONTROL = 'public, max-age=60'
+commands_payload = None
+commands_payload_source = None
+
+# Player actions the dashboard may run; the bot acknowledges within the timeout
+MUSIC_ACTIONS = ('skip', 'pause', 'resume', 'stop')
+MUSIC_ACTION_TIMEOUT = 3.0
 
 # Economy system variables
 user_balances = {}
@@ -53,9 +81,13 @@ class WebBot(commands.Bot):
             description='Discord bot with web interface'
         )
         
+    async def setup_hook(self):
+        # Publish dashboard snapshots to the web server's loop
+        await self.load_extension('cog.dashboard_state')
+        bridge.attach(self)
+        self.get_cog('DashboardState').subscribe(bridge.publish)
+
     async def on_ready(self):
-        global bot_ready
-        bot_ready = True
         print(f'Bot {self.user} is ready for web interface')
 
     # Basic Commands
@@ -322,9 +354,26 @@ def init_bot():
         except Exception as e:
             print(f"Error loading cogs: {e}")
 
+@app.before_serving
+async def open_http_session():
+    """Create the pooled client used for Discord OAuth and connect to the bot"""
+    global http_session, event_hub
+    http_session = aiohttp.ClientSession(timeout=OAUTH_TIMEOUT, connector=aiohttp.TCPConnector(limit=100))
+    await bridge.start()
+    event_hub = EventHub(bridge)
+
+@app.after_serving
+async def close_http_session():
+    """Close the pooled OAuth client, event streams and the bot connection"""
+    if event_hub is not None:
+        event_hub.close()
+    await bridge.stop()
+    if http_session is not None:
+        await http_session.close()
+
 # Discord OAuth Routes
 @app.route('/auth/login')
-def discord_login():
+async def discord_login():
     """Redirect to Discord OAuth"""
     params = {
         'client_id': DISCORD_CLIENT_ID,
@@ -337,8 +386,15 @@ def discord_login():
     discord_url = f"https://discord.com/api/oauth2/authorize?{urlencode(params)}"
     return redirect(discord_url)
 
+async def discord_get(path, access_token):
+    """GET a Discord API resource on behalf of the user"""
+    async with http_session.get(f'{DISCORD_API_BASE}{path}', headers={
+        'Authorization': f'Bearer {access_token}'
+    }) as response:
+        return await response.json(content_type=None)
+
 @app.route('/auth/callback')
-def discord_callback():
+async def discord_callback():
     """Handle Discord OAuth callback"""
     code = request.args.get('code')
     state = request.args.get('state')
@@ -346,36 +402,31 @@ def discord_callback():
     if not code:
         return jsonify({"error": "Authorization failed"}), 400
     
-    # Exchange code for access token
-    token_response = requests.post('https://discord.com/api/oauth2/token', data={
-        'client_id': DISCORD_CLIENT_ID,
-        'client_secret': DISCORD_CLIENT_SECRET,
-        'code': code,
-        'grant_type': 'authorization_code',
-        'redirect_uri': DISCORD_REDIRECT_URI
-    }, headers={'Content-Type': 'application/x-www-form-urlencoded'})
-    
-    token_data = token_response.json()
-    access_token = token_data.get('access_token')
-    
-    if not access_token:
-        return jsonify({"error": "Failed to get access token"}), 400
-    
-    # Get user info from Discord
-    user_response = requests.get('https://discord.com/api/users/@me', headers={
-        'Authorization': f'Bearer {access_token}'
-    })
-    
-    user_data = user_response.json()
-    
-    # Get user's guilds
-    guilds_response = requests.get('https://discord.com/api/users/@me/guilds', headers={
-        'Authorization': f'Bearer {access_token}'
-    })
-    
-    guilds_data = guilds_response.json()
+    try:
+        # Exchange code for access token
+        async with http_session.post(f'{DISCORD_API_BASE}/oauth2/token', data={
+            'client_id': DISCORD_CLIENT_ID,
+            'client_secret': DISCORD_CLIENT_SECRET,
+            'code': code,
+            'grant_type': 'authorization_code',
+            'redirect_uri': DISCORD_REDIRECT_URI
+        }) as token_response:
+            token_data = await token_response.json(content_type=None)
+        access_token = token_data.get('access_token')
+        
+        if not access_token:
+            return jsonify({"error": "Failed to get access token"}), 400
+        
+        # User info and guilds don't depend on each other
+        user_data, guilds_data = await asyncio.gather(
+            discord_get('/users/@me', access_token),
+            discord_get('/users/@me/guilds', access_token)
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return jsonify({"error": "Discord did not respond"}), 502
     
-    # Store user session
+    # New id on login: an id handed out before authentication must not carry the user
+    session.regenerate()
     session['user'] = {
         'id': user_data['id'],
         'username': user_data['username'],
@@ -390,13 +441,13 @@ def discord_callback():
     return redirect('/dashboard')
 
 @app.route('/auth/logout')
-def logout():
+async def logout():
     """Logout user"""
     session.clear()
     return redirect('/')
 
 @app.route('/auth/user')
-def get_user():
+async def get_user():
     """Get current user info"""
     if 'user' not in session:
         return jsonify({"error": "Not authenticated"}), 401
@@ -404,81 +455,50 @@ def get_user():
     return jsonify(session['user'])
 
 @app.route('/auth/check')
-def check_auth():
+async def check_auth():
     """Check if user is authenticated"""
     return jsonify({"authenticated": 'user' in session})
 
 # API Routes
 @app.route('/api/commands', methods=['GET'])
-def get_commands():
+async def get_commands():
     """Get all bot commands with live data"""
-    if not bot_ready or not bot:
+    global commands_payload, commands_payload_source
+    snapshot = bridge.snapshot
+    if not snapshot.ready:
         return jsonify({"error": "Bot not ready"}), 503
     
-    commands_data = []
-    
-    # Get prefix commands
-    for command in bot.commands:
-        if not command.hidden:
-            commands_data.append({
-                "name": command.name,
-                "usage": f"!{command.name} {command.signature}",
-                "description": command.help or "No description",
-                "aliases": command.aliases,
-                "permissions": [str(p) for p in command.checks] if command.checks else ["Send Messages"],
-                "examples": [f"!{command.name}"],
-                "category": "basic",
-                "type": "prefix"
-            })
-    
-    # Get slash commands
-    for command in bot.tree.get_commands():
-        commands_data.append({
-            "name": f"/{command.name}",
-            "usage": f"/{command.name}",
-            "description": command.description or "No description",
-            "aliases": [],
-            "permissions": ["Send Messages"],
-            "examples": [f"/{command.name}"],
-            "category": "slash",
-            "type": "slash"
-        })
-    
-    return jsonify({"commands": commands_data})
+    # The catalog tuple is reused across snapshots until an extension changes it
+    if snapshot.commands is not commands_payload_source:
+        commands_payload = PrecompressedJSON(
+            {"commands": [command.to_dict() for command in snapshot.commands]},
+            COMMANDS_CACHE_CONTROL
+        )
+        commands_payload_source = snapshot.commands
+    return commands_payload.response(request)
 
 @app.route('/api/bot/status', methods=['GET'])
-def get_bot_status():
+async def get_bot_status():
     """Get bot connection status"""
-    if not bot:
-        return jsonify({"status": "offline", "guilds": 0, "users": 0})
-    
-    return jsonify({
-        "status": "online" if bot_ready else "offline",
-        "guilds": len(bot.guilds),
-        "users": sum(guild.member_count for guild in bot.guilds),
-        "uptime": str(datetime.now().replace(tzinfo=None) - bot.user.created_at.replace(tzinfo=None)) if bot_ready else None
-    })
+    # Every value is maintained by the bot as events arrive; nothing is walked here
+    snapshot = bridge.snapshot
+    status = status_payload(snapshot)
+    if snapshot.ready:
+        status["uptime"] = str(timedelta(seconds=int(time.time() - snapshot.started_at)))
+    return jsonify(status)
 
 @app.route('/api/guilds', methods=['GET'])
-def get_guilds():
+async def get_guilds():
     """Get list of guilds the bot is in"""
-    if not bot_ready:
+    snapshot = bridge.snapshot
+    if not snapshot.ready:
         return jsonify({"error": "Bot not ready"}), 503
     
-    guilds = []
-    for guild in bot.guilds:
-        guilds.append({
-            "id": str(guild.id),
-            "name": guild.name,
-            "member_count": guild.member_count,
-            "icon_url": str(guild.icon.url) if guild.icon else None
-        })
-    
-    return jsonify({"guilds": guilds})
+    return jsonify({"guilds": [guild.to_dict() for guild in snapshot.guilds]})
 
 # Root route - redirect to dashboard if logged in, login page if not
 @app.route('/')
-def index():
+async def index():
     """Root route - redirect based on login status"""
     if 'user' in session:
         # User is logged in, redirect to dashboard
@@ -489,80 +509,177 @@ def index():
 
 # Static file serving for CSS, JS, and other assets
 @app.route('/css/<path:filename>')
-def serve_css(filename):
+async def serve_css(filename):
     """Serve CSS files"""
-    return send_from_directory('css', filename)
+    return await send_from_directory('css', filename)
 
 @app.route('/js/<path:filename>')
-def serve_js(filename):
+async def serve_js(filename):
     """Serve JS files"""
-    return send_from_directory('js', filename)
+    return await send_from_directory('js', filename)
 
 @app.route('/assets/<path:filename>')
-def serve_assets(filename):
+async def serve_assets(filename):
     """Serve asset files"""
-    return send_from_directory('.', filename)
+    return await send_from_directory('.', filename)
 
 # Login page route
 @app.route('/login')
-def login_page():
+async def login_page():
     """Serve the login page"""
     try:
-        return send_from_directory('.', 'login.html')
+        return await send_from_directory('.', 'login.html')
     except FileNotFoundError:
         return "Login page not found", 404
 
 # Dashboard page route
 @app.route('/dashboard')
-def dashboard_page():
+async def dashboard_page():
     """Serve the dashboard page - requires authentication"""
     if 'user' not in session:
         return redirect('/login')
     try:
-        return send_from_directory('.', 'dashboard.html')
+        return await send_from_directory('.', 'dashboard.html')
     except FileNotFoundError:
         return "Dashboard page not found", 404
 
 # Protected routes (require authentication)
+async def user_admin_guild_ids(user, snapshot, only=None):
+    """Ids of guilds ``user`` administers (of ``only``, if given); raises BridgeError if the bot can't answer"""
+    # Only guilds from the user's OAuth list that the bot is also in can match
+    oauth_guilds = user.get('guilds')
+    if not isinstance(oauth_guilds, list):
+        oauth_guilds = []
+    shared_ids = [int(guild['id']) for guild in oauth_guilds if snapshot.guild(int(guild['id']))]
+    if only is not None:
+        shared_ids = [guild_id for guild_id in shared_ids if guild_id in only]
+    if not shared_ids:
+        return []
+    
+    # Member permissions are live state, so ask the bot loop (it caches per user and guild)
+    return await bridge.request('admin_guild_ids', int(user['id']), shared_ids)
+
 @app.route('/api/user/guilds', methods=['GET'])
-def get_user_guilds():
+async def get_user_guilds():
     """Get guilds where the authenticated user is admin"""
     if 'user' not in session:
         return jsonify({"error": "Not authenticated"}), 401
     
-    if not bot_ready:
+    snapshot = bridge.snapshot
+    if not snapshot.ready:
         return jsonify({"error": "Bot not ready"}), 503
     
+    try:
+        guild_ids = await user_admin_guild_ids(session['user'], snapshot)
+    except BridgeTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except BridgeError as e:
+        return jsonify({"error": str(e)}), 503
+    
     user_guilds = []
-    for guild in bot.guilds:
-        member = guild.get_member(int(session['user']['id']))
-        if member and member.guild_permissions.administrator:
-            user_guilds.append({
-                "id": str(guild.id),
-                "name": guild.name,
-                "member_count": guild.member_count,
-                "icon_url": str(guild.icon.url) if guild.icon else None
-            })
+    for guild_id in guild_ids:
+        guild = snapshot.guild(guild_id)
+        if guild:
+            user_guilds.append(guild.to_dict())
     
     return jsonify({"guilds": user_guilds})
 
+@app.route('/api/events', methods=['GET'])
+async def dashboard_events():
+    """Server-Sent Events: status, music and temp voice changes as the bot publishes them"""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    # Per-guild events only go to admins of that guild; the hub re-checks when the bot
+    # comes online, its guilds change, and periodically
+    user = session['user']
+    
+    async def access(snapshot):
+        return await user_admin_guild_ids(user, snapshot)
+    
+    client = event_hub.connect(access)
+    response = await make_response(event_hub.stream(client), 200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.timeout = None  # streams stay open
+    return response
+
+async def authorize_guild(guild_id):
+    """None if the session's user administers the guild, otherwise an error response"""
+    if 'user' not in session:
+        return jsonify({"error": "Not authenticated"}), 401
+    
+    snapshot = bridge.snapshot
+    if not snapshot.ready:
+        return jsonify({"error": "Bot not ready"}), 503
+    if snapshot.guild(guild_id) is None:
+        return jsonify({"error": "Guild not found"}), 404
+    
+    try:
+        guild_ids = await user_admin_guild_ids(session['user'], snapshot, only={guild_id})
+    except BridgeTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except BridgeError as e:
+        return jsonify({"error": str(e)}), 503
+    if guild_id not in guild_ids:
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+@app.route('/api/music/<int:guild_id>', methods=['GET'])
+async def get_music(guild_id):
+    """Player state and queue preview of a guild"""
+    error = await authorize_guild(guild_id)
+    if error:
+        return error
+    
+    # Served from the published snapshot; the player itself is never touched here
+    return jsonify(bridge.snapshot.player(guild_id).to_dict())
+
+@app.route('/api/music/<int:guild_id>/<action>', methods=['POST'])
+async def music_action(guild_id, action):
+    """Run skip, pause, resume or stop on a guild's player"""
+    error = await authorize_guild(guild_id)
+    if error:
+        return error
+    if action not in MUSIC_ACTIONS:
+        return jsonify({"error": f"Unknown music action: {action}"}), 400
+    
+    # The bot acknowledges once the action ran on its loop, with the resulting player state
+    try:
+        result = await bridge.request('music_action', guild_id, action, timeout=MUSIC_ACTION_TIMEOUT)
+    except BridgeTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except BridgeError as e:
+        return jsonify({"error": str(e)}), 503
+    
+    if not result.get('ok'):
+        return jsonify({"error": result.get('error')}), 409
+    return jsonify(result)
+
 # Start bot in separate thread
 def run_bot():
     init_bot()
-    bot.run(DISCORD_BOT_TOKEN)
+    bot.run(DISCORD_BOT_TOKEN, log_handler=None)
 
 # Start web server
 if __name__ == '__main__':
-    # Create session directory
-    os.makedirs('./flask_session', exist_ok=True)
+    import uvicorn
+
+    # Non-blocking logging shared by the bot thread and the web server
+    from cog.performance_optimizations import setup_logging
+    setup_logging()
     
+    # Host the bot in this process instead of connecting to one
+    bridge = BotBridge()
+
     # Start bot in background thread
     bot_thread = threading.Thread(target=run_bot, daemon=True)
     bot_thread.start()
     
     # Wait for bot to be ready
-    import time
     time.sleep(5)
     
     # Start web server
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('WEB_PORT', '5000')), log_config=None)
@@ -0,0 +1,148 @@
+"""
+Server-side sessions for the Quart dashboard
+Session data lives in files keyed by a random id; the cookie only carries the signed id
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import secrets
+import time
+
+from itsdangerous import BadSignature, Signer
+from quart.sessions import SecureCookieSession, SessionInterface
+
+
+class ServerSideSession(SecureCookieSession):
+    """Session dict that remembers its id"""
+
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid or secrets.token_urlsafe(32)
+        self.previous_sid = None
+
+    def regenerate(self):
+        """Move the data to a fresh id, e.g. on login, so a pre-login id can't be reused"""
+        if self.previous_sid is None:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class FileSessionInterface(SessionInterface):
+    """Store sessions as JSON files, like Flask-Session's filesystem backend
+
+    OAuth sessions hold the user's whole guild list, which does not fit the
+    4 KB a cookie session allows.
+    """
+
+    session_class = ServerSideSession
+    salt = "dashboard-session"
+    # Abandoned sessions are only removed by a sweep, run on write at most this often
+    SWEEP_INTERVAL = 600
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.last_sweep = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt=self.salt)
+
+    def _path(self, sid: str) -> str:
+        # Hash so a cookie can never name an arbitrary file
+        return os.path.join(self.directory, hashlib.sha256(sid.encode()).hexdigest() + '.json')
+
+    def _read(self, sid: str):
+        try:
+            with open(self._path(sid), 'r') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get('expires', 0) < time.time():
+            self._delete(sid)
+            return None
+        return stored.get('data')
+
+    def _write(self, sid: str, data: dict, expires: float):
+        path = self._path(sid)
+        tmp_path = f"{path}.{secrets.token_hex(4)}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'expires': expires, 'data': data}, f)
+        os.replace(tmp_path, path)
+        if time.time() - self.last_sweep >= self.SWEEP_INTERVAL:
+            self._sweep()
+
+    def _sweep(self):
+        """Delete session files past their expiry, and temp files left by interrupted writes"""
+        now = self.last_sweep = time.time()
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.endswith('.tmp'):
+                    expired = entry.stat().st_mtime < now - self.SWEEP_INTERVAL
+                elif entry.name.endswith('.json'):
+                    with open(entry.path, 'r') as f:
+                        expired = json.load(f).get('expires', 0) < now
+                else:
+                    continue
+                if expired:
+                    os.remove(entry.path)
+            except (OSError, ValueError):
+                continue
+
+    def _delete(self, sid: str):
+        try:
+            os.remove(self._path(sid))
+        except OSError:
+            pass
+
+    async def open_session(self, app, request):
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self.session_class()
+        try:
+            sid = self._signer(app).unsign(cookie).decode()
+        except BadSignature:
+            return self.session_class()
+
+        data = await asyncio.to_thread(self._read, sid)
+        if data is None:
+            return self.session_class()
+        return self.session_class(data, sid=sid)
+
+    async def save_session(self, app, session, response):
+        if response is None:
+            return
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if session.previous_sid is not None:
+            await asyncio.to_thread(self._delete, session.previous_sid)
+            session.previous_sid = None
+
+        if not session:
+            if session.modified:
+                await asyncio.to_thread(self._delete, session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified:
+            return
+
+        lifetime = app.permanent_session_lifetime.total_seconds()
+        await asyncio.to_thread(self._write, session.sid, dict(session), time.time() + lifetime)
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid.encode()).decode(),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )